@@ -0,0 +1,207 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains timing benchmarks for the performance sensitive parts of
+the game. Run it directly to print a table of results.
+"""
+from typing import Callable, List, Tuple
+import random
+import timeit
+import tracemalloc
+
+from block import Block, generate_board
+from flatboard import FlatBoard, generate_boards
+from goal import BlobGoal, _flatten
+from settings import BOARD_SIZE, COLOUR_LIST
+
+
+def _cell_colour(block: Block, loc: Tuple[int, int]) -> Tuple[int, int, int]:
+    """Return the colour of the unit cell at <loc> within <block>, by walking
+    from <block> down to the leaf that covers it.
+    """
+    mid = 2 ** (block.max_depth - block.level - 1)
+    if not block.children:
+        return block.colour
+    elif loc[0] >= mid > loc[1]:
+        return _cell_colour(block.children[0], (loc[0] - mid, loc[1]))
+    elif loc[0] < mid and loc[1] < mid:
+        return _cell_colour(block.children[1], loc)
+    elif loc[0] < mid <= loc[1]:
+        return _cell_colour(block.children[2], (loc[0], loc[1] - mid))
+    else:
+        return _cell_colour(block.children[3], (loc[0] - mid, loc[1] - mid))
+
+
+def _flatten_per_cell(block: Block) -> List[List[Tuple[int, int, int]]]:
+    """Return the same grid as goal._flatten, but with one walk from <block>
+    per unit cell. This is the original flattening strategy, kept here as the
+    baseline to compare against.
+    """
+    size = 2 ** (block.max_depth - block.level)
+    return [[_cell_colour(block, (i, j)) for j in range(size)]
+            for i in range(size)]
+
+
+def _fine_board(max_depth: int) -> Block:
+    """Return a random board whose leaves are all at <max_depth>, so that the
+    benchmark measures the worst case for a board of this depth.
+    """
+    board = generate_board(max_depth, BOARD_SIZE)
+    stack = [board]
+    while stack:
+        block = stack.pop()
+        block.smash()
+        stack.extend(block.children)
+    return board
+
+
+def benchmark_flatten(depths: List[int], repeat: int = 3) \
+        -> List[Tuple[int, float, float]]:
+    """Return a list of (depth, per cell seconds, single walk seconds) timings
+    for flattening a fully subdivided board at each of <depths>.
+
+    Each timing is the best of <repeat> runs.
+    """
+    results = []
+    for depth in depths:
+        board = _fine_board(depth)
+        assert _flatten(board) == _flatten_per_cell(board)
+        old = min(timeit.repeat(lambda: _flatten_per_cell(board),
+                                number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: _flatten(board),
+                                number=1, repeat=repeat))
+        results.append((depth, old, new))
+    return results
+
+
+def _allocated(make: Callable[[], object]) -> int:
+    """Return the number of bytes allocated by <make> for the object it
+    returns.
+    """
+    tracemalloc.start()
+    result = make()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def benchmark_copy(depths: List[int], repeat: int = 3) \
+        -> List[Tuple[int, float, float, float, float]]:
+    """Return a list of (depth, Block seconds, FlatBoard seconds, Block bytes
+    per node, FlatBoard bytes per node) measurements for copying a fully
+    subdivided board at each of <depths>.
+    """
+    results = []
+    for depth in depths:
+        board = _fine_board(depth)
+        flat = FlatBoard.from_block(board)
+        old = min(timeit.repeat(board.create_copy, number=1, repeat=repeat))
+        new = min(timeit.repeat(flat.copy, number=1, repeat=repeat))
+        nodes = len(flat)
+        results.append((depth, old, new,
+                        _allocated(board.create_copy) / nodes,
+                        _allocated(flat.copy) / nodes))
+    return results
+
+
+def benchmark_score(depths: List[int], repeat: int = 3) \
+        -> List[Tuple[int, float, float]]:
+    """Return a list of (depth, flattened seconds, summary seconds) timings for
+    rescoring a BlobGoal after painting one unit cell of a fully subdivided
+    board at each of <depths>.
+
+    The summary timing uses the subtree summaries cached by the previous
+    incremental_score, so only the path to the painted cell is summarized
+    again.
+    """
+    results = []
+    goal = BlobGoal(COLOUR_LIST[0])
+    for depth in depths:
+        board = _fine_board(depth)
+        leaf = board
+        while leaf.children:
+            leaf = leaf.children[1]
+        colours = [COLOUR_LIST[0], COLOUR_LIST[1]]
+
+        def repaint() -> None:
+            """Paint <leaf> the other of <colours>."""
+            colours.reverse()
+            leaf.paint(colours[0])
+
+        assert goal.incremental_score(board) == \
+            goal.flattened_score(_flatten(board))
+        old = min(timeit.repeat(
+            lambda: repaint() or goal.flattened_score(_flatten(board)),
+            number=1, repeat=repeat))
+        new = min(timeit.repeat(
+            lambda: repaint() or goal.incremental_score(board),
+            number=1, repeat=repeat))
+        results.append((depth, old, new))
+    return results
+
+
+def benchmark_generate(depths: List[int], num_boards: int = 1000,
+                       repeat: int = 3) -> List[Tuple[int, float, float]]:
+    """Return a list of (depth, one at a time seconds, batch seconds) timings
+    for generating <num_boards> random boards at each of <depths>.
+    """
+    results = []
+    for depth in depths:
+        old = min(timeit.repeat(
+            lambda: [generate_board(depth, BOARD_SIZE)
+                     for _ in range(num_boards)],
+            number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: generate_boards(num_boards, depth),
+                                number=1, repeat=repeat))
+        results.append((depth, old, new))
+    return results
+
+
+def _print_table(title: str, rows: List[Tuple[int, float, float]]) -> None:
+    """Print <rows> of (depth, old seconds, new seconds) under <title>.
+    """
+    print(title)
+    print(f'{"depth":>5} {"before (ms)":>12} {"after (ms)":>12} '
+          f'{"speedup":>8}')
+    for depth, old, new in rows:
+        print(f'{depth:>5} {old * 1000:>12.3f} {new * 1000:>12.3f} '
+              f'{old / new:>7.1f}x')
+
+
+if __name__ == '__main__':
+    random.seed(148)
+    _print_table('=== goal._flatten ===', benchmark_flatten(list(range(3, 9))))
+
+    print()
+    _print_table('=== BlobGoal rescore after a paint ===',
+                 benchmark_score(list(range(3, 8))))
+
+    print()
+    _print_table('=== 1000 boards: generate_board vs generate_boards ===',
+                 benchmark_generate(list(range(3, 7))))
+
+    print('\n=== Block.create_copy vs FlatBoard.copy ===')
+    print(f'{"depth":>5} {"Block (ms)":>11} {"Flat (ms)":>10} '
+          f'{"Block B/node":>13} {"Flat B/node":>12}')
+    for row in benchmark_copy(list(range(3, 8))):
+        print(f'{row[0]:>5} {row[1] * 1000:>11.3f} {row[2] * 1000:>10.3f} '
+              f'{row[3]:>13.1f} {row[4]:>12.1f}')
@@ -22,17 +22,21 @@ Misha Schwartz, and Jaisie Sin
 This file contains the Block class, the main data structure used in the game.
 """
 from __future__ import annotations
-from typing import Optional, Tuple, List
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, List
 import random
 import math
 
 from settings import colour_name, COLOUR_LIST
 
 
-def generate_board(max_depth: int, size: int) -> Block:
+def generate_board(max_depth: int, size: int,
+                   rng: Optional[random.Random] = None) -> Block:
     """Return a new game board with a depth of <max_depth> and dimensions of
     <size> by <size>.
 
+    Random numbers are drawn from <rng>, or from the random module if <rng> is
+    None.
+
     >>> board = generate_board(3, 750)
     >>> board.max_depth
     3
@@ -41,8 +45,10 @@ def generate_board(max_depth: int, size: int) -> Block:
     >>> len(board.children) == 4
     True
     """
-    board = Block((0, 0), size, random.choice(COLOUR_LIST), 0, max_depth)
-    board.smash()
+    if rng is None:
+        rng = random
+    board = Block((0, 0), size, rng.choice(COLOUR_LIST), 0, max_depth)
+    board.smash(rng)
 
     return board
 
@@ -78,6 +84,10 @@ class Block:
         The blocks into which this block is subdivided. The children are
         stored in this order: upper-right child, upper-left child,
         lower-left child, lower-right child.
+    version:
+        A number shared by every Block, which increases whenever the structure
+        or colours of any Block change. A board is unchanged for as long as
+        its version stays the same, unless it is moved to a new position.
 
     === Representation Invariants===
     - len(children) == 0 or len(children) == 4
@@ -92,12 +102,54 @@ class Block:
         - its colour is not None.
     - level <= max_depth
     """
+    # === Private Attributes ===
+    # _colour:
+    #   The colour of this Block, as returned by <colour>.
+    # _children:
+    #   The blocks into which this block is subdivided, in the same order as
+    #   <children>. Their positions are out of date if <_stale> is not None.
+    # _stale:
+    #   None if the positions of this Block's children are up to date.
+    #   Otherwise, this Block has moved or its children have been reordered
+    #   since they were last positioned, and <_stale> is the number of
+    #   clockwise quarter turns that the subtrees of its children have yet to
+    #   be rotated by, which is 0 if they have only moved.
+    # _parent:
+    #   The Block that this Block is a child of, or None if it is the root.
+    # _hash:
+    #   The structural hash of this Block, or None if it has not been computed
+    #   since this Block or one of its descendants last changed.
+    # _summaries:
+    #   Values computed from this Block and its descendants by cached, keyed
+    #   by what they summarize, or None if there are none.
+    #
+    # Swaps and rotations only reorder the children of the block they move,
+    # and mark it as stale. A block brings its children up to date the first
+    # time they are accessed, passing on any rotation to them, and marks them
+    # stale in turn, so positions are rewritten and subtrees rotated one level
+    # at a time, and only along the parts of the tree that are actually
+    # visited.
+    #
+    # Every move clears the cached hash and summaries of the block it changes
+    # and of that block's ancestors, so rehashing or summarizing a board after
+    # a move only recomputes the values along one path. If a block's hash is
+    # None, so are its ancestors', and if a block has no summary for some key,
+    # neither do its ancestors. Setting <colour> or <children> clears them in
+    # the same way, and <children> is a tuple so that it cannot be changed in
+    # place.
+    __slots__ = ('position', 'size', '_colour', 'level', 'max_depth',
+                 '_children', '_stale', '_parent', '_hash', '_summaries')
     position: Tuple[int, int]
     size: int
-    colour: Optional[Tuple[int, int, int]]
     level: int
     max_depth: int
-    children: List[Block]
+    _colour: Optional[Tuple[int, int, int]]
+    _children: Tuple[Block, ...]
+    version: int = 0
+    _stale: Optional[int]
+    _parent: Optional[Block]
+    _hash: Optional[int]
+    _summaries: Optional[Dict[Hashable, Any]]
 
     def __init__(self, position: Tuple[int, int], size: int,
                  colour: Optional[Tuple[int, int, int]], level: int,
@@ -113,10 +165,177 @@ class Block:
         """
         self.position = position
         self.size = size
-        self.colour = colour
+        self._colour = colour
         self.level = level
         self.max_depth = max_depth
-        self.children = []
+        self._children = ()
+        self._stale = None
+        self._parent = None
+        self._hash = None
+        self._summaries = None
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this Block if it is not subdivided, or None if it is.
+        """
+        return self._colour
+
+    @colour.setter
+    def colour(self, colour: Optional[Tuple[int, int, int]]) -> None:
+        """Set the colour of this Block to <colour>.
+        """
+        self._colour = colour
+        self._changed()
+
+    @property
+    def children(self) -> Tuple[Block, ...]:
+        """The blocks into which this block is subdivided, with positions
+        consistent with this Block's.
+        """
+        if self._stale is not None and self._children:
+            self._place_children()
+        return self._children
+
+    @children.setter
+    def children(self, children: List[Block]) -> None:
+        """Set the children of this Block to <children>, which are already
+        positioned within this Block.
+
+        Precondition: len(children) == 0 or len(children) == 4
+        """
+        self.settle()
+        self._children = tuple(children)
+        for child in children:
+            child._parent = self
+        self._stale = None
+        self._changed()
+
+    def _place_children(self) -> None:
+        """Move this Block's children to the positions consistent with its own,
+        rotate their subtrees by any turns still owed to them, and mark them so
+        that their descendants follow when they are accessed.
+        """
+        turns = self._stale
+        self._stale = None
+        for child, position in zip(self._children,
+                                   self._children_positions()):
+            child.position = position
+            if not child._children:
+                continue
+            if turns:
+                child._turn(turns)
+            elif child._stale is None:
+                child._stale = 0
+
+    def _turn(self, turns: int) -> None:
+        """Rotate this Block's subtree clockwise by <turns> quarter turns, by
+        reordering its children and leaving the rotation of their subtrees
+        until they are accessed.
+
+        Only the cached hash and summaries of this Block are cleared, since
+        those of its ancestors are already clear if it is owed a rotation.
+
+        Precondition: this Block has children, and 0 < turns < 4
+        """
+        children = self._children
+        self._children = children[turns:] + children[:turns]
+        self._stale = ((self._stale or 0) + turns) % 4
+        self._hash = None
+        self._summaries = None
+
+    def settle(self) -> None:
+        """Bring the position of this Block, and the order of its children, up
+        to date with any moves of its ancestors that have not yet reached it.
+
+        A Block reached through the children of its ancestors is always up to
+        date. One that was kept from before a move elsewhere on the board must
+        be settled before its children are recorded, for example to restore
+        them later. Moves settle the Block they are made on.
+
+        This takes one step for each ancestor of this Block.
+        """
+        ancestors = []
+        block = self._parent
+        while block is not None:
+            ancestors.append(block)
+            block = block._parent
+        for ancestor in reversed(ancestors):
+            if ancestor._stale is not None:
+                ancestor._place_children()
+
+    def _changed(self) -> None:
+        """Record that the structure or colours of this Block have changed, by
+        clearing the cached hash and summaries of this Block and its ancestors.
+        """
+        Block.version += 1
+        block = self
+        while block is not None and \
+                (block._hash is not None or block._summaries):
+            block._hash = None
+            block._summaries = None
+            block = block._parent
+
+    def cached(self, key: Hashable, compute: Callable[[Block], Any]) -> Any:
+        """Return compute(self), reusing the value computed by the last call
+        with <key> if this Block and its descendants have not changed since.
+
+        <compute> must depend only on the structure, colours and levels of
+        this Block and its descendants. It may use cached on this Block's
+        children with the same <key>, so that after a move only the summaries
+        of the changed block and its ancestors are computed again.
+        """
+        if self._summaries is None:
+            self._summaries = {}
+        elif key in self._summaries:
+            return self._summaries[key]
+        value = compute(self)
+        self._summaries[key] = value
+        return value
+
+    def has_cached(self, key: Hashable) -> bool:
+        """Return True iff the value computed by the last call to cached with
+        <key> is still cached on this Block.
+        """
+        return self._summaries is not None and key in self._summaries
+
+    def __hash__(self) -> int:
+        """Return a hash of the structure, colours and levels of this Block and
+        its descendants.
+
+        Blocks that are equal have the same hash, whatever their positions. The
+        hash changes whenever the Block does, so a Block should not be used as
+        a dictionary key itself. Use the value of its hash instead.
+        """
+        if self._hash is None:
+            children = self.children
+            if children:
+                self._hash = hash(tuple(hash(child) for child in children))
+            else:
+                self._hash = hash((self.level, self.max_depth, self.colour))
+        return self._hash
+
+    def path(self) -> Tuple[int, ...]:
+        """Return the child indexes followed from the root of this Block's tree
+        to reach this Block.
+
+        >>> board = generate_board(3, 750)
+        >>> board.path()
+        ()
+        >>> board.children[2].path()
+        (2,)
+        """
+        self.settle()
+        path = []
+        block = self
+        while block._parent is not None:
+            parent = block._parent
+            for i, child in enumerate(parent._children):
+                if child is block:
+                    path.append(i)
+                    break
+            block = parent
+        path.reverse()
+        return tuple(path)
 
     def __str__(self) -> str:
         """Return this Block in a string format.
@@ -185,18 +404,10 @@ class Block:
         descendants to have positions consistent with this Block's.
 
         <position> is the (x, y) coordinates of the upper-left corner of this
-        Block.
+        Block. The descendants are updated as they are accessed.
         """
         self.position = position
-        if self.children:
-            size = self._child_size()
-            self.children[0]._update_children_positions((position[0] + size,
-                                                         position[1]))
-            self.children[1]._update_children_positions(position)
-            self.children[2]._update_children_positions((position[0],
-                                                         position[1] + size))
-            self.children[3]._update_children_positions((position[0] + size,
-                                                         position[1] + size))
+        self._stale = self._stale or 0
 
     def smashable(self) -> bool:
         """Return True iff this block can be smashed.
@@ -206,46 +417,54 @@ class Block:
         """
         return self.level != self.max_depth and len(self.children) == 0
 
-    def smash(self) -> bool:
+    def smash(self, rng: Optional[random.Random] = None) -> bool:
         """Sub-divide this block so that it has four randomly generated
         children.
 
         If this Block's level is <max_depth>, do nothing. If this block has
-        children, do nothing.
+        children, do nothing. Random numbers are drawn from <rng>, or from the
+        random module if <rng> is None.
 
         Return True iff the smash was performed.
         """
         if not self.smashable():
             return False
         else:
+            self.settle()
+            if rng is None:
+                rng = random
             i = 0
             self.colour = None
-            num = random.random()
+            children = []
+            num = rng.random()
             while i < 4:
                 if i == 0:
                     block1 = Block((self.position[0] + self.size // 2,
                                     self.position[1]), self.size // 2,
-                                   random.choice(COLOUR_LIST),
+                                   rng.choice(COLOUR_LIST),
                                    self.level + 1, self.max_depth)
                 elif i == 1:
                     block1 = Block((self.position[0], self.position[1]),
-                                   self.size // 2, random.choice(COLOUR_LIST),
+                                   self.size // 2, rng.choice(COLOUR_LIST),
                                    self.level + 1, self.max_depth)
                 elif i == 2:
                     block1 = Block((self.position[0], self.position[1] +
                                     self.size // 2), self.size // 2,
-                                   random.choice(COLOUR_LIST),
+                                   rng.choice(COLOUR_LIST),
                                    self.level + 1, self.max_depth)
                 else:
                     block1 = Block((self.position[0] + self.size // 2,
                                     self.position[1] + self.size // 2),
-                                   self.size // 2, random.choice(COLOUR_LIST),
+                                   self.size // 2, rng.choice(COLOUR_LIST),
                                    self.level + 1, self.max_depth)
 
                 if num < math.exp(-0.25 * self.level):
-                    block1.smash()
-                self.children.append(block1)
+                    block1.smash(rng)
+                block1._parent = self
+                children.append(block1)
                 i += 1
+            self._children = tuple(children)
+            self._stale = None
             return True
 
     def swap(self, direction: int) -> bool:
@@ -258,19 +477,23 @@ class Block:
 
         Precondition: <direction> is either 0 or 1
         """
-        if not self.children:
+        self.settle()
+        children = self._children
+        if not children:
             return False
 
         elif direction == 0:  # Swap horizontally
 
-            self.children = [self.children[1], self.children[0],
-                             self.children[3], self.children[2]]
-            self._update_children_positions(self.position)
+            self._children = (children[1], children[0], children[3],
+                              children[2])
+            self._stale = self._stale or 0
+            self._changed()
             return True
         else:
-            self.children = [self.children[3], self.children[2],
-                             self.children[1], self.children[0]]
-            self._update_children_positions(self.position)
+            self._children = (children[3], children[2], children[1],
+                              children[0])
+            self._stale = self._stale or 0
+            self._changed()
             return True
 
     def rotate(self, direction: int) -> bool:
@@ -279,29 +502,18 @@ class Block:
         If this Block has no children, do nothing. If <direction> is 1, rotate
         clockwise. If <direction> is 3, rotate counter-clockwise.
 
+        Only the children of this Block are reordered now. Its descendants are
+        rotated as they are accessed.
+
         Return True iff the rotate was performed.
 
         Precondition: <direction> is either 1 or 3.
         """
-        if not self.children:
+        if not self._children:
             return False
-
-        elif direction == 1:
-            self.children = [self.children[1], self.children[2],
-                             self.children[3], self.children[0]]
-            self._update_children_positions(self.position)
-            for child in self.children:
-                if child.children:
-                    child.rotate(direction)
-            return True
-        else:
-            self.children = [self.children[3], self.children[0],
-                             self.children[1], self.children[2]]
-            self._update_children_positions(self.position)
-            for child in self.children:
-                if child.children:
-                    child.rotate(direction)
-            return True
+        self._changed()
+        self._turn(direction)
+        return True
 
     def paint(self, colour: Tuple[int, int, int]) -> bool:
         """Change this Block's colour iff it is a leaf at a level of max_depth
@@ -329,21 +541,43 @@ class Block:
         """
         if self.level != self.max_depth - 1 or not self.children:
             return False
-        else:
-            num = {}
-            for child in self.children:
-                if child.colour not in num:
-                    num[child.colour] = 0
-                num[child.colour] += 1
-            x = list(num.values())
-            y = list(num.keys())
-            maximum = max(x)
-            minimum = min(x)
-            if maximum / 4 >= 0.5 and minimum != maximum:
-                self.children = []
-                self.colour = y[x.index(maximum)]
-                return True
+        colour = self._majority_colour()
+        if colour is None:
             return False
+        else:
+            self.children = []
+            self.colour = colour
+            return True
+
+    def combinable(self) -> bool:
+        """Return True iff this block can be combined.
+
+        A block can be combined if it is at a level of max_depth - 1, it has
+        children, and its children have a majority colour.
+        """
+        return self.level == self.max_depth - 1 and len(self.children) != 0 \
+            and self._majority_colour() is not None
+
+    def _majority_colour(self) -> Optional[Tuple[int, int, int]]:
+        """Return the colour with the most children of that colour, or None if
+        there is no such colour.
+
+        There is no majority colour if two colours are tied for the most
+        children, if no colour covers at least two children, or if all four
+        children share one colour.
+        """
+        num = {}
+        for child in self.children:
+            if child.colour not in num:
+                num[child.colour] = 0
+            num[child.colour] += 1
+        x = list(num.values())
+        y = list(num.keys())
+        maximum = max(x)
+        minimum = min(x)
+        if maximum / 4 >= 0.5 and minimum != maximum:
+            return y[x.index(maximum)]
+        return None
 
     def create_copy(self) -> Block:
         """Return a new Block that is a deep copy of this Block.
@@ -23,15 +23,18 @@ This file contains the different game states for the Blocky game.
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import random
 import pygame
 
 from actions import ACTION_MESSAGE, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
 from block import Block
 from player import Player
+from raster import AVAILABLE as RASTER_AVAILABLE, raster_squares
 from renderer import Renderer
-from settings import ANIMATION_DURATION
+from replay import ReplayWriter
+from settings import ANIMATION_DURATION, RASTER_MIN_DEPTH
 
 
 def _block_to_squares(board: Block) -> List[Tuple[Tuple[int, int, int],
@@ -46,16 +49,18 @@ def _block_to_squares(board: Block) -> List[Tuple[Tuple[int, int, int],
     - the size of the block,
     in that order.
 
-    The order of the squares does not matter.
+    The order of the squares does not matter. They are listed in preorder,
+    which is also the order they are drawn in.
     """
-    if board.colour is not None:
-        return [(board.colour, board.position, board.size)]
-    else:
-        final = []
-        for x in board.children:
-            y = _block_to_squares(x)
-            final.extend(y)
-        return final
+    final = []
+    stack = [board]
+    while stack:
+        block = stack.pop()
+        if block.colour is not None:
+            final.append((block.colour, block.position, block.size))
+        else:
+            stack.extend(reversed(block.children))
+    return final
 
 
 class GameData:
@@ -79,17 +84,31 @@ class GameData:
     === Representation Invariants ===
     - len(players) >= 1
     """
+    # === Private Attributes ===
+    # _replay:
+    #   Records each successful move, or None if the game is not recorded.
+    # _rng:
+    #   The random number generator that smashes draw from.
     max_turns: int
     board: Block
     players: List[Player]
     smashes: Dict[int, int]
     combines: Dict[int, int]
     paints: Dict[int, int]
+    _replay: Optional[ReplayWriter]
+    _rng: random.Random
 
-    def __init__(self, board: Block, players: List[Player]) -> None:
+    def __init__(self, board: Block, players: List[Player],
+                 replay: Optional[BinaryIO] = None,
+                 rng: Optional[random.Random] = None) -> None:
         """Initialize the game data, saving a reference to <board> and
         <players>.
 
+        If <replay> is not None, every successful move is recorded to it as a
+        replay, which can be played back with replay.ReplayReader. Smashes
+        draw random numbers from <rng>, or from the random module if <rng> is
+        None.
+
         Precondition:
             - len(players) >= 1
         """
@@ -107,6 +126,46 @@ class GameData:
             self.combines[player.id] = 0
             self.paints[player.id] = 0
 
+        self._rng = random if rng is None else rng
+        self._replay = None
+        if replay is not None:
+            self._replay = ReplayWriter(
+                replay, board, [player.goal for player in players])
+
+    def apply_move(self, player: Player,
+                   move: Tuple[str, Optional[int], Block]) -> bool:
+        """Attempt to do <move> on the board on behalf of <player>.
+
+        Successful smashes, combines and paints count against <player>. Return
+        True iff the move was successful.
+        """
+        action = (move[0], move[1])
+        direction = move[1]
+        block = move[2]
+        move_successful = False
+
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            move_successful = block.rotate(direction)
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            move_successful = block.swap(direction)
+        elif action == SMASH:
+            move_successful = block.smash(self._rng)
+            self.smashes[player.id] += int(move_successful)
+        elif action == PAINT:
+            move_successful = block.paint(player.goal.colour)
+            self.paints[player.id] += int(move_successful)
+        elif action == COMBINE:
+            move_successful = block.combine()
+            self.combines[player.id] += int(move_successful)
+        elif action == PASS:
+            # Do nothing to the board
+            move_successful = True
+
+        if move_successful and self._replay is not None:
+            self._replay.record(player.id, move)
+
+        return move_successful
+
     def calculate_score(self, player_id: int) -> Tuple[int, int]:
         """Return a tuple containing first the <player_id>'s score based on
         their goal in the game and second the deductions from their score based
@@ -155,10 +214,19 @@ class MainState(GameState):
     #   The index of the current player in GameData.players.
     # _current_score:
     #   The score of the current player, including penalties.
+    # _squares:
+    #   The version of the board that the squares were last listed for, and
+    #   those squares.
+    # _pixels:
+    #   The version of the board that it was last rasterized for, and its
+    #   pixels, for boards deep enough to be rasterized.
     _turn: int
     _data: GameData
     _current_player_index: int
     _current_score: int
+    _squares: Tuple[int, List[Tuple[Tuple[int, int, int], Tuple[int, int],
+                                    int]]]
+    _pixels: Tuple[int, Any]
 
     def __init__(self, data: GameData) -> None:
         """Initialize this GameState.
@@ -166,6 +234,8 @@ class MainState(GameState):
         self._turn = 0
         self._data = data
         self._current_player_index = 0
+        self._squares = (-1, [])
+        self._pixels = (-1, None)
 
         score, penalty = self._data.calculate_score(self._current_player().id)
         self._current_score = score - penalty
@@ -190,28 +260,7 @@ class MainState(GameState):
     def _do_move(self, move: Tuple[str, Optional[int], Block]) -> bool:
         """Attempt to do the player's requested move.
         """
-        action = (move[0], move[1])
-        direction = move[1]
-        block = move[2]
-        player = self._current_player()
-        move_successful = False
-
-        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
-            move_successful = block.rotate(direction)
-        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
-            move_successful = block.swap(direction)
-        elif action == SMASH:
-            move_successful = block.smash()
-            self._data.smashes[player.id] += int(move_successful)
-        elif action == PAINT:
-            move_successful = block.paint(self._current_player().goal.colour)
-            self._data.paints[player.id] += int(move_successful)
-        elif action == COMBINE:
-            move_successful = block.combine()
-            self._data.combines[player.id] += int(move_successful)
-        elif action == PASS:
-            # Do nothing
-            move_successful = True
+        move_successful = self._data.apply_move(self._current_player(), move)
 
         if move_successful:
             self._update_player()
@@ -246,7 +295,17 @@ class MainState(GameState):
                 return self
 
     def render(self, renderer: Renderer) -> None:
-        renderer.draw_board(_block_to_squares(self._data.board))
+        # The board is only listed or rasterized again once it has changed.
+        board = self._data.board
+        if self._squares[0] != board.version:
+            self._squares = (board.version, _block_to_squares(board))
+        if RASTER_AVAILABLE and board.max_depth >= RASTER_MIN_DEPTH:
+            if self._pixels[0] != board.version:
+                self._pixels = (board.version,
+                                raster_squares(self._squares[1], board.size))
+            renderer.draw_pixels(self._pixels[1])
+        else:
+            renderer.draw_board(self._squares[1])
 
         b = self._current_player().get_selected_block(self._data.board)
         if b is not None:
@@ -372,7 +431,8 @@ if __name__ == '__main__':
         'allowed-io': ['run_game'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'pygame', '__future__',
-            'block', 'player', 'renderer', 'settings', 'actions'
+            'block', 'player', 'raster', 'renderer', 'replay', 'settings',
+            'actions'
         ],
         'generated-members': 'pygame.*'
     })
@@ -24,16 +24,32 @@ Please use this as a starting point to check your work and write your own
 tests!
 """
 from typing import List, Optional, Tuple
+import io
 import os
+import random
 import pygame
 import pytest
 
-from block import Block
-from blocky import _block_to_squares
-from goal import BlobGoal, PerimeterGoal, _flatten
-from player import _get_block
-from renderer import Renderer
+import goal
+from actions import SMASH
+from block import Block, generate_board
+from blocky import GameData, _block_to_squares
+from export import FrameExporter, ImageSequence, RawFrameFile
+from flatboard import FlatBoard, generate_boards
+from goal import BlobGoal, PerimeterGoal, TranspositionTable, _flatten
+from mcts import MCTSEngine
+from moves import MoveJournal, legal_moves
+from persistent import PersistentBlock
+from player import HumanPlayer, RandomPlayer, SearchPlayer, SmartPlayer, \
+    _get_block
+from raster import AVAILABLE as RASTER_AVAILABLE, raster_squares
+from renderer import IMAGE_CACHE_CAPACITY, Renderer
+from replay import ReplayReader
+from search import SearchEngine
+from serialize import decode, encode
 from settings import COLOUR_LIST
+from simulation import HeadlessGame, play_turns
+from tournament import run_tournament
 
 
 def set_children(block: Block, colours: List[Optional[Tuple[int, int, int]]]) \
@@ -49,10 +65,11 @@ def set_children(block: Block, colours: List[Optional[Tuple[int, int, int]]]) \
     level = block.level + 1
     depth = block.max_depth
 
-    block.children = []  # Potentially discard children
+    children = []
     for i in range(4):
         b = Block(positions[i], size, colours[i], level, depth)
-        block.children.append(b)
+        children.append(b)
+    block.children = children  # Potentially discard children
 
 
 @pytest.fixture
@@ -164,6 +181,28 @@ def test_block_to_squares_reference(board_16x16) -> None:
     assert squares == expected
 
 
+@pytest.mark.skipif(not RASTER_AVAILABLE, reason='NumPy is not installed')
+def test_raster_squares(board_16x16) -> None:
+    """Test that rasterizing the squares of a board gives the same pixels as
+    drawing each of them, including at odd sizes and after moves that place
+    children at rounded positions.
+    """
+    board = generate_board(4, 97, random.Random(148))
+    board.children[1].rotate(1)
+    board_16x16.children[0].swap(0)
+    for board in [generate_board(4, 750, random.Random(148)), board,
+                  board_16x16]:
+        squares = _block_to_squares(board)
+        surface = pygame.Surface((board.size, board.size))
+        surface.fill((0, 0, 0))
+        for colour, pos, side in squares:
+            rect = (pos[0], pos[1], side, side)
+            pygame.draw.rect(surface, colour, rect, 0)
+            pygame.draw.rect(surface, (0, 0, 0), rect, 3)
+        expected = pygame.surfarray.array3d(surface)
+        assert (raster_squares(squares, board.size) == expected).all()
+
+
 class TestRender:
     """A collection of methods that show you a way to save the boards in your
     test cases to image (i.e., PNG) files.
@@ -205,6 +244,66 @@ class TestRender:
         renderer.draw_board(_block_to_squares(board_16x16))
         renderer.save_to_file('your-rotate-1.png')
 
+    def test_draw_image_cache(self, renderer) -> None:
+        """Test that action images are only scaled once for each size, and
+        that the number of scaled images kept is bounded, but large enough
+        for every image scaled ahead of time by cache_images.
+        """
+        renderer.cache_images(2)
+        scaled = renderer._scaled_image(('swap', 0), 187)
+        renderer.draw_image(('swap', 0), (0, 0), 187)
+        assert renderer._scaled_image(('swap', 0), 187) is scaled
+        assert scaled.get_size() == (187, 187)
+
+        for size in range(1, IMAGE_CACHE_CAPACITY + 2):
+            renderer.draw_image(('pass', None), (0, 0), size)
+        assert len(renderer._scaled) == IMAGE_CACHE_CAPACITY
+
+        renderer._scaled.clear()
+        renderer.cache_images(9)
+        assert len(renderer._scaled) == 8 * 10
+        for level in range(10):
+            assert (('pass', None), 750 >> level) in renderer._scaled
+
+    @pytest.mark.skipif(not RASTER_AVAILABLE, reason='NumPy is not installed')
+    def test_draw_pixels(self, renderer) -> None:
+        """Test that a board drawn from its pixels looks the same as one drawn
+        from its squares, and that drawing squares afterwards redraws it.
+        """
+        board = generate_board(3, 750, random.Random(148))
+        other = generate_board(3, 750, random.Random(149))
+        squares = _block_to_squares(board)
+        renderer.draw_board(squares)
+        expected = pygame.surfarray.array3d(renderer._board)
+        renderer.draw_pixels(raster_squares(_block_to_squares(other), 750))
+        renderer.draw_pixels(raster_squares(squares, 750))
+        assert (pygame.surfarray.array3d(renderer._board) == expected).all()
+        renderer.draw_pixels(raster_squares(_block_to_squares(other), 750))
+        renderer.draw_board(squares)
+        assert (pygame.surfarray.array3d(renderer._board) == expected).all()
+
+    def test_export_replay(self, tmp_path) -> None:
+        """Test that a replay is exported as one frame per move and turn, plus
+        the animation frames of each move, to either kind of sink.
+        """
+        stream = io.BytesIO()
+        HeadlessGame(3, 2, [], stream, random.Random(148)).run_game(2)
+        exporter = FrameExporter(animation_frames=3)
+        raw = io.BytesIO()
+        assert exporter.export(io.BytesIO(stream.getvalue()),
+                               RawFrameFile(raw)) == 1 + 4 * (3 + 1)
+        width, height = exporter._renderer.screen().get_size()
+        frame = width * height * 3
+        assert len(raw.getvalue()) == 17 * frame
+        # Each move's animation frames are identical.
+        assert raw.getvalue()[frame:2 * frame] == \
+            raw.getvalue()[3 * frame:4 * frame]
+
+        sink = ImageSequence(str(tmp_path / 'frame-{:03d}.png'))
+        exporter.export(io.BytesIO(stream.getvalue()), sink)
+        assert sink.frames_written == 17
+        assert (tmp_path / 'frame-016.png').exists()
+
 
 class TestBlock:
     """A collection of methods that test the Block class.
@@ -257,6 +356,146 @@ class TestBlock:
         board_16x16.children[0].rotate(1)
         assert board_16x16 == board_16x16_rotate1
 
+    def test_hash(self, board_16x16, board_16x16_swap0) -> None:
+        """Test that the hash of the reference board follows its moves, and
+        matches the hash of an equal board.
+        """
+        original = hash(board_16x16)
+        board_16x16.swap(0)
+        assert hash(board_16x16) == hash(board_16x16_swap0)
+        assert hash(board_16x16) != original
+        board_16x16.swap(0)
+        assert hash(board_16x16) == original
+
+        board_16x16.children[0].children[1].paint(COLOUR_LIST[0])
+        assert hash(board_16x16) == hash(board_16x16.create_copy())
+        assert hash(board_16x16) != original
+
+    def test_hash_follows_direct_changes(self, board_16x16) -> None:
+        """Test that setting the colour of a block directly updates the cached
+        hash and summaries of the board, and that its children cannot be
+        changed in place.
+        """
+        goal = BlobGoal(COLOUR_LIST[0])
+        goal.incremental_score(board_16x16)
+        original = hash(board_16x16)
+
+        leaf = board_16x16.children[0].children[1]
+        if leaf.colour == COLOUR_LIST[0]:
+            leaf.colour = COLOUR_LIST[1]
+        else:
+            leaf.colour = COLOUR_LIST[0]
+        assert hash(board_16x16) == hash(board_16x16.create_copy())
+        assert hash(board_16x16) != original
+        assert goal.incremental_score(board_16x16) == \
+            goal.flattened_score(_flatten(board_16x16))
+
+        with pytest.raises(AttributeError):
+            board_16x16.children.append(leaf)
+
+
+class TestFlatBoard:
+    """A collection of methods that test the FlatBoard class against the
+    Block class.
+    """
+    def test_round_trip(self, board_16x16) -> None:
+        """Test that the reference board survives conversion to and from a
+        FlatBoard.
+        """
+        flat = FlatBoard.from_block(board_16x16)
+        assert len(flat) == 9
+        assert flat.colour(FlatBoard.node_at([1])) == COLOUR_LIST[2]
+        assert flat.colour(FlatBoard.node_at([0])) is None
+        block = flat.to_block((0, 0), 750)
+        assert block.children[0].children[0].position == (562, 0)
+        assert FlatBoard.from_block(block) == flat
+
+    def test_moves(self, board_16x16, board_16x16_swap0,
+                   board_16x16_rotate1) -> None:
+        """Test that moves on a FlatBoard have the same effect as on Blocks.
+        """
+        flat = FlatBoard.from_block(board_16x16)
+        copy = flat.copy()
+        assert flat.swap(0, 0)
+        assert flat == FlatBoard.from_block(board_16x16_swap0)
+        assert copy == FlatBoard.from_block(board_16x16)
+
+        assert copy.rotate(FlatBoard.node_at([0]), 1)
+        assert copy == FlatBoard.from_block(board_16x16_rotate1)
+        assert not copy.rotate(FlatBoard.node_at([1]), 1)
+
+        assert copy.combine(FlatBoard.node_at([0]))
+        board_16x16_rotate1.children[0].combine()
+        assert copy == FlatBoard.from_block(board_16x16_rotate1)
+        assert not copy.paint(FlatBoard.node_at([1]), COLOUR_LIST[0])
+
+    def test_generate_boards(self) -> None:
+        """Test that a batch of generated boards is reproducible, and that
+        every board in it is a well formed board of the right depth.
+        """
+        batch = generate_boards(50, 3, random.Random(148))
+        assert len(batch) == 50
+        again = generate_boards(50, 3, random.Random(148))
+        assert bytes(batch.codes) == bytes(again.codes)
+
+        for i, block in enumerate(batch):
+            assert block.max_depth == 3
+            assert len(block.children) == 4
+            assert FlatBoard.from_block(block) == batch.flat(i)
+
+
+class TestPersistentBlock:
+    """A collection of methods that test the PersistentBlock class against the
+    Block class.
+    """
+    def test_moves(self, board_16x16, board_16x16_swap0,
+                   board_16x16_rotate1) -> None:
+        """Test that moves on a PersistentBlock have the same effect as on
+        Blocks, and leave the old board unchanged.
+        """
+        board = PersistentBlock.from_block(board_16x16)
+        swapped = board.swap([], 0)
+        assert swapped == PersistentBlock.from_block(board_16x16_swap0)
+        assert board == PersistentBlock.from_block(board_16x16)
+
+        rotated = board.rotate([0], 1)
+        assert rotated == PersistentBlock.from_block(board_16x16_rotate1)
+        assert rotated.children[1] is board.children[1]
+        assert board.rotate([1], 1) is None
+
+        combined = rotated.combine([0])
+        board_16x16_rotate1.children[0].combine()
+        assert combined == PersistentBlock.from_block(board_16x16_rotate1)
+        assert combined.children[2] is board.children[2]
+        assert combined.paint([1], COLOUR_LIST[0]) is None
+
+        block = combined.to_block((0, 0), 750)
+        assert PersistentBlock.from_block(block) == combined
+
+        smashed = combined.apply(SMASH, [1], rng=random.Random(148))
+        assert block.children[1].smash(random.Random(148))
+        assert smashed == PersistentBlock.from_block(block)
+
+
+class TestSerialize:
+    """A collection of methods that test the encode and decode functions.
+    """
+    def test_round_trip(self, board_16x16, board_16x16_swap0) -> None:
+        """Test that decoding an encoded board gives back a board with the same
+        structure and colours, and that a truncated encoding is rejected.
+        """
+        data = encode(board_16x16)
+        assert _flatten(decode(data)) == _flatten(board_16x16)
+        assert hash(decode(data)) == hash(board_16x16)
+        assert encode(decode(data)) == data
+        assert encode(board_16x16_swap0) != data
+
+        block = decode(data)
+        block.children[0].children[1].paint(COLOUR_LIST[3])
+        assert decode(encode(block)) == block
+        with pytest.raises(ValueError):
+            decode(data[:3])
+
 
 class TestPlayer:
     """A collection of methods for testing the methods and functions in the
@@ -283,6 +522,52 @@ class TestPlayer:
         assert _get_block(board_16x16, top_right, 2) == \
             board_16x16.children[0].children[0]
 
+    def test_get_block_outside(self, board_16x16) -> None:
+        """Test that no block is retrieved from outside the reference board.
+        """
+        size = board_16x16.size
+        assert _get_block(board_16x16, (size, 0), 2) is None
+        assert _get_block(board_16x16, (0, -1), 0) is None
+        assert _get_block(board_16x16, (size - 1, size - 1), 2) == \
+            board_16x16.children[3]
+
+    def test_selected_block_follows_board(self, board_16x16,
+                                          monkeypatch) -> None:
+        """Test that a HumanPlayer's selected block is kept until the mouse,
+        its level or the board changes.
+        """
+        monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: (0, 0))
+        player = HumanPlayer(0, BlobGoal(COLOUR_LIST[0]))
+        assert player.get_selected_block(board_16x16) is board_16x16
+        player.process_event(pygame.event.Event(pygame.KEYDOWN,
+                                                key=pygame.K_s))
+        upper_left = board_16x16.children[1]
+        assert player.get_selected_block(board_16x16) is upper_left
+        assert player.get_selected_block(board_16x16) is upper_left
+
+        board_16x16.swap(0)
+        assert player.get_selected_block(board_16x16) is \
+            board_16x16.children[1]
+        monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: (749, 0))
+        assert player.get_selected_block(board_16x16) is upper_left
+
+    def test_parallel_candidates(self) -> None:
+        """Test that a SmartPlayer that scores its candidates in a process pool
+        chooses the same move, and draws the same random numbers, as one that
+        scores them itself.
+        """
+        random.seed(148)
+        board = generate_board(4, 750)
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1)
+        results = []
+        for processes in [1, 2]:
+            player = SmartPlayer(0, BlobGoal(COLOUR_LIST[2]), 60, processes)
+            random.seed(1)
+            player.process_event(event)
+            move = player.generate_move(board)
+            results.append((move[:2], id(move[2]), random.random()))
+        assert results[0] == results[1]
+
 
 class TestGoal:
     """A collection of methods for testing the sub-classes of Goal.
@@ -328,6 +613,273 @@ class TestGoal:
             goal = PerimeterGoal(colour)
             assert goal.score(board_16x16) == expected
 
+    def test_blob_goal_large_blob(self) -> None:
+        """Test that a blob covering a deep board is measured without running
+        out of stack.
+        """
+        board = Block((0, 0), 750, COLOUR_LIST[0], 0, 8)
+        flattened = _flatten(board)
+
+        assert BlobGoal(COLOUR_LIST[0]).flattened_score(flattened) == 4 ** 8
+        assert BlobGoal(COLOUR_LIST[1]).flattened_score(flattened) == 0
+
+    def test_array_scores(self, monkeypatch) -> None:
+        """Test that scoring on a NumPy array of palette indexes gives the same
+        results as scoring on the flattened lists.
+        """
+        pytest.importorskip('numpy')
+        monkeypatch.setattr(goal, 'ARRAY_MIN_DEPTH', 0)
+        random.seed(148)
+        boards = [generate_board(depth, 750) for depth in range(0, 7)]
+
+        for board in boards:
+            flattened = _flatten(board)
+            for colour in COLOUR_LIST:
+                for cls in [BlobGoal, PerimeterGoal]:
+                    assert cls(colour).score(board) == \
+                        cls(colour).flattened_score(flattened)
+
+    def test_summary_scores(self) -> None:
+        """Test that scores assembled from cached subtree summaries match the
+        scores of the flattened boards, as moves change the boards, whether
+        they are scored incrementally or by a score that finds the summaries
+        left by earlier moves.
+        """
+        random.seed(148)
+        boards = [generate_board(depth, 750) for depth in range(0, 6)]
+
+        for board in boards:
+            for move in list(legal_moves(board, COLOUR_LIST[0]))[::3]:
+                MoveJournal().apply(move, COLOUR_LIST[0])
+                flattened = _flatten(board)
+                for colour in COLOUR_LIST:
+                    for cls in [BlobGoal, PerimeterGoal]:
+                        expected = cls(colour).flattened_score(flattened)
+                        assert cls(colour).score(board) == expected
+                        assert cls(colour).incremental_score(board) == \
+                            expected
+
+    def test_transposition_table(self, board_16x16) -> None:
+        """Test that a board returned to by rotations is not scored again.
+        """
+        table = TranspositionTable()
+        target = BlobGoal(COLOUR_LIST[1])
+        score = table.score(target, board_16x16)
+        for _ in range(4):
+            board_16x16.children[0].rotate(1)
+            assert table.score(target, board_16x16) == \
+                target.score(board_16x16)
+        assert table.score(target, board_16x16) == score
+        assert table.misses == 4
+        assert table.hits == 2
+        assert len(table) == 4
+
+
+class TestMoves:
+    """A collection of methods for testing the moves module.
+    """
+    def test_legal_moves(self, board_16x16) -> None:
+        """Test that exactly the moves that would succeed are listed.
+        """
+        actions = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1),
+                   ('smash', None), ('combine', None), ('paint', None)]
+        blocks = [board_16x16, *board_16x16.children,
+                  *board_16x16.children[0].children]
+
+        expected = []
+        for block in blocks:
+            for action in actions:
+                journal = MoveJournal()
+                move = action + (block,)
+                if journal.apply(move, COLOUR_LIST[0]):
+                    expected.append(move)
+                    journal.undo()
+
+        result = list(legal_moves(board_16x16, COLOUR_LIST[0]))
+        assert len(result) == len(expected)
+        for move in expected:
+            assert any(m[:2] == move[:2] and m[2] is move[2] for m in result)
+
+    def test_undo_redo(self, board_16x16) -> None:
+        """Test that every kind of move can be undone and redone.
+        """
+        original = board_16x16.create_copy()
+        journal = MoveJournal()
+        moves = [('rotate', 1, board_16x16.children[0]),
+                 ('swap', 1, board_16x16),
+                 ('smash', None, board_16x16.children[1]),
+                 ('paint', None, board_16x16.children[0].children[1]),
+                 ('combine', None, board_16x16.children[0]),
+                 ('rotate', 3, board_16x16)]
+        for move in moves:
+            assert journal.apply(move, COLOUR_LIST[0])
+        assert not journal.apply(('smash', None, board_16x16))
+        changed = board_16x16.create_copy()
+
+        while journal.undo():
+            pass
+        assert board_16x16 == original
+
+        while journal.redo():
+            pass
+        assert board_16x16 == changed
+        assert len(journal) == len(moves)
+
+
+class TestSearch:
+    """A collection of methods for testing the SearchEngine class.
+    """
+    def test_one_ply(self, board_16x16) -> None:
+        """Test that a one ply search finds the move with the best outcome for
+        the searching player, and leaves the board as it was.
+        """
+        goals = [BlobGoal(COLOUR_LIST[1]), PerimeterGoal(COLOUR_LIST[3])]
+        engine = SearchEngine(goals, max_plies=1)
+        copy = board_16x16.create_copy()
+        move, plies = engine.search(board_16x16, 0)
+        assert plies == 1
+        assert board_16x16 == copy
+
+        journal = MoveJournal()
+        values = []
+        for candidate in legal_moves(board_16x16, COLOUR_LIST[1]):
+            if candidate[0] != 'smash':
+                journal.apply(candidate, COLOUR_LIST[1])
+                penalty = 1 if candidate[0] in ['paint', 'combine'] else 0
+                values.append(goals[0].score(board_16x16) - penalty -
+                              goals[1].score(board_16x16))
+                journal.undo()
+        journal.apply(move, COLOUR_LIST[1])
+        penalty = 1 if move[0] in ['paint', 'combine'] else 0
+        assert goals[0].score(board_16x16) - penalty - \
+            goals[1].score(board_16x16) == max(values)
+
+    def test_search_player(self) -> None:
+        """Test that SearchPlayers can play a game, searching deeper than one
+        ply.
+        """
+        random.seed(148)
+        board = generate_board(3, 750)
+        goals = [BlobGoal(COLOUR_LIST[0]), PerimeterGoal(COLOUR_LIST[1])]
+        players = [SearchPlayer(0, goals[0], goals, 0.5),
+                   SearchPlayer(1, goals[1], goals, 0.5)]
+        data = GameData(board, players)
+
+        scores = play_turns(data, 2)
+        assert [s[0] for s in scores] == [0, 1]
+        assert all(player.plies >= 2 for player in players)
+
+
+class TestMCTS:
+    """A collection of methods for testing the MCTSEngine class.
+    """
+    def test_search(self, board_16x16) -> None:
+        """Test that a search returns a legal move, leaves the board as it was,
+        and reuses its tree on the next turn.
+        """
+        random.seed(148)
+        goals = [BlobGoal(COLOUR_LIST[1])]
+        engine = MCTSEngine(goals, 200)
+        copy = board_16x16.create_copy()
+        move, playouts = engine.search(board_16x16, 0)
+        assert playouts == 200
+        assert board_16x16 == copy
+        assert move[:2] == ('pass', None) or \
+            move in list(legal_moves(board_16x16, COLOUR_LIST[1]))
+
+        assert MoveJournal().apply(move, COLOUR_LIST[1])
+        _, playouts = engine.search(board_16x16, 0)
+        assert playouts > 200
+
+
+class TestGameData:
+    """A collection of methods for testing GameData.
+    """
+    def test_scores_follow_moves(self, board_16x16) -> None:
+        """Test that goal scores are kept up to date as moves are applied.
+        """
+        players = [RandomPlayer(0, BlobGoal(COLOUR_LIST[3])),
+                   RandomPlayer(1, PerimeterGoal(COLOUR_LIST[1]))]
+        data = GameData(board_16x16, players)
+        assert data.calculate_score(0) == (5, 0)
+        assert data.calculate_score(1) == (5, 0)
+
+        moves = [('rotate', 1, board_16x16.children[0]),
+                 ('swap', 0, board_16x16),
+                 ('combine', None, board_16x16.children[0])]
+        for move in moves:
+            assert data.apply_move(players[0], move)
+            for player in players:
+                goal_score, _ = data.calculate_score(player.id)
+                assert goal_score == player.goal.score(board_16x16)
+
+        assert data.combines[0] == 1
+
+    def test_play_turns(self) -> None:
+        """Test that a game between computer players can be played without a
+        display.
+        """
+        random.seed(148)
+        board = generate_board(3, 750)
+        players = [RandomPlayer(0, BlobGoal(COLOUR_LIST[0])),
+                   SmartPlayer(1, PerimeterGoal(COLOUR_LIST[1]), 5)]
+        data = GameData(board, players)
+
+        scores = play_turns(data, 5)
+        assert [s[0] for s in scores] == [0, 1]
+        for player_id, goal_score, penalty in scores:
+            assert goal_score == players[player_id].goal.score(board)
+            assert penalty == data.calculate_score(player_id)[1]
+
+    def test_replay(self) -> None:
+        """Test that a recorded game replays to the same board and scores, and
+        that a replay can be stopped after any move.
+        """
+        random.seed(148)
+        board = generate_board(3, 750)
+        players = [RandomPlayer(0, BlobGoal(COLOUR_LIST[0])),
+                   SmartPlayer(1, BlobGoal(COLOUR_LIST[1]), 5)]
+        stream = io.BytesIO()
+        data = GameData(board, players, stream)
+        initial = encode(board)
+        scores = play_turns(data, 10)
+
+        reader = ReplayReader(io.BytesIO(stream.getvalue()))
+        assert encode(reader.board) == initial
+        assert len(list(reader.moves())) == 20
+        assert encode(reader.board) == encode(board)
+        assert reader.scores() == scores
+
+        reader = ReplayReader(io.BytesIO(stream.getvalue()))
+        assert reader.advance(5) == 5
+        assert reader.advance(100) == 15
+
+    def test_seeded_games(self) -> None:
+        """Test that games with their own generators can be played again
+        exactly, and leave the random module alone.
+        """
+        random.seed(148)
+        state = random.getstate()
+        results = []
+        for _ in range(2):
+            stream = io.BytesIO()
+            game = HeadlessGame(4, 1, [5], stream, random.Random(1))
+            results.append((game.run_game(5), stream.getvalue()))
+        assert results[0] == results[1]
+        assert random.getstate() == state
+
+    def test_tournament(self) -> None:
+        """Test that a tournament gives the same results in parallel as it
+        does in one process.
+        """
+        serial = run_tournament(4, 2, 1, [3], 2, seed=148, processes=1)
+        parallel = run_tournament(4, 2, 1, [3], 2, seed=148, processes=2)
+
+        assert serial.num_games() == 4
+        assert serial.labels == ['Random', 'Smart(3)']
+        assert serial.scores == parallel.scores
+        assert serial.wins == parallel.wins
+
 
 if __name__ == '__main__':
     pytest.main(['example_tests.py'])
@@ -0,0 +1,253 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the FrameExporter class, which plays back replays without
+a window and draws each of their frames as the game would have shown them, and
+the frame sinks it writes those frames to: ImageSequence, which saves each
+frame as a numbered image file, and RawFrameFile, which appends the RGB bytes
+of each frame to a single stream.
+
+Every replay exported by one FrameExporter is drawn on the same screen
+surface, using the dummy SDL video driver unless another driver has been
+chosen.
+"""
+from typing import Any, BinaryIO, Tuple
+import os
+import shutil
+import pygame
+
+from actions import ACTION_MESSAGE
+from blocky import _block_to_squares
+from block import Block
+from moves import block_at
+from raster import AVAILABLE as RASTER_AVAILABLE, raster_squares
+from renderer import Renderer
+from replay import ReplayReader
+from settings import ANIMATION_DURATION, BOARD_SIZE, RASTER_MIN_DEPTH
+
+# The number of frames per second of an exported replay, the same as the
+# frame rate of Game.run_game.
+FRAME_RATE = 30
+
+
+class FrameSink:
+    """A destination for the frames of exported replays.
+
+    This is an abstract class. Only child classes should be instantiated.
+
+    === Public Attributes ===
+    frames_written:
+        The number of frames written so far.
+    """
+    frames_written: int
+
+    def __init__(self) -> None:
+        """Initialize a sink that no frames have been written to.
+        """
+        self.frames_written = 0
+
+    def write(self, surface: pygame.Surface, count: int = 1) -> None:
+        """Write <count> copies of the frame on <surface>.
+        """
+        raise NotImplementedError
+
+
+class ImageSequence(FrameSink):
+    """A sink that saves each frame to its own image file, numbered from 0.
+
+    === Public Attributes ===
+    pattern:
+        The name of each file, with a replacement field for the number of the
+        frame, such as 'frames/{:06d}.png'. The extension of the name chooses
+        the image format, as in pygame.image.save.
+    """
+    pattern: str
+
+    def __init__(self, pattern: str) -> None:
+        """Initialize a sink that saves frames to files named by <pattern>.
+        """
+        FrameSink.__init__(self)
+        self.pattern = pattern
+
+    def write(self, surface: pygame.Surface, count: int = 1) -> None:
+        """Save <count> copies of the frame on <surface>, each to the next
+        numbered file.
+
+        The frame is only encoded once, and then its file is copied.
+        """
+        if count < 1:
+            return
+        first = self.pattern.format(self.frames_written)
+        pygame.image.save(surface, first)
+        for i in range(1, count):
+            shutil.copyfile(first,
+                            self.pattern.format(self.frames_written + i))
+        self.frames_written += count
+
+
+class RawFrameFile(FrameSink):
+    """A sink that appends each frame to one binary stream, as rows of 3 byte
+    RGB pixels from the top left corner with no header or padding.
+
+    This is the rawvideo format with the rgb24 pixel format, which video
+    encoders such as ffmpeg can read directly, given the size of the frames.
+    """
+    # === Private Attributes ===
+    # _stream:
+    #   The stream the frames are written to.
+    _stream: BinaryIO
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """Initialize a sink that appends frames to <stream>.
+        """
+        FrameSink.__init__(self)
+        self._stream = stream
+
+    def write(self, surface: pygame.Surface, count: int = 1) -> None:
+        """Append <count> copies of the frame on <surface> to the stream.
+        """
+        if count < 1:
+            return
+        data = pygame.image.tobytes(surface, 'RGB')
+        for _ in range(count):
+            self._stream.write(data)
+        self.frames_written += count
+
+
+class FrameExporter:
+    """A player of replays that draws their frames off screen.
+
+    Each exported replay starts with a frame of its initial board. Each move
+    is then shown for <animation_frames> frames as AnimateMoveState shows it,
+    over the board before the move, followed by a frame of the board after
+    the move with the status line of MainState.
+
+    === Public Attributes ===
+    animation_frames:
+        The number of frames that each move is animated for.
+    """
+    # === Private Attributes ===
+    # _renderer:
+    #   Draws every frame, on the same screen surface.
+    # _raster:
+    #   True iff boards of the replay being exported are rasterized, rather
+    #   than drawn one square at a time.
+    # _drawn:
+    #   The version of the board that was last drawn, and its squares or
+    #   pixels.
+    animation_frames: int
+    _renderer: Renderer
+    _raster: bool
+    _drawn: Tuple[int, Any]
+
+    def __init__(self,
+                 animation_frames: int = ANIMATION_DURATION * FRAME_RATE) \
+            -> None:
+        """Initialize an exporter that animates each move for
+        <animation_frames> frames.
+
+        The dummy SDL video driver is used, so that no window is opened,
+        unless SDL_VIDEODRIVER is already set.
+        """
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.display.init()
+        pygame.font.init()
+        self.animation_frames = animation_frames
+        self._renderer = Renderer(BOARD_SIZE)
+        self._raster = False
+        self._drawn = (-1, None)
+
+    def export(self, replay: BinaryIO, sink: FrameSink) -> int:
+        """Write the frames of the replay in <replay> to <sink>, and return the
+        number of frames written.
+
+        Raise a ValueError if <replay> is not a complete replay.
+        """
+        reader = ReplayReader(replay)
+        board = reader.board
+        self._raster = RASTER_AVAILABLE and board.max_depth >= RASTER_MIN_DEPTH
+        self._drawn = (-1, None)
+        self._renderer.cache_images(board.max_depth)
+        start = sink.frames_written
+
+        self._draw_turn(reader, sink)
+        for player_id, action, path in reader.moves():
+            block = block_at(board, path)
+            if self.animation_frames > 0:
+                # The board is still drawn as it was before the move.
+                self._renderer.clear()
+                self._show()
+                self._renderer.highlight_block(block.position, block.size)
+                self._renderer.draw_image(action, block.position, block.size)
+                self._renderer.draw_status(
+                    f'Player {player_id} is {ACTION_MESSAGE[action]}')
+                sink.write(self._renderer.screen(), self.animation_frames)
+            self._draw_turn(reader, sink)
+        return sink.frames_written - start
+
+    def _draw_turn(self, reader: ReplayReader, sink: FrameSink) -> None:
+        """Write a frame of the board of <reader> to <sink>, with the status of
+        the player whose turn it is.
+        """
+        num_players = len(reader.goals)
+        turn, player_id = divmod(reader.moves_read, num_players)
+        goal = reader.goals[player_id]
+        score = goal.score(reader.board) - reader.penalties[player_id]
+
+        self._renderer.clear()
+        self._draw_board(reader.board)
+        self._renderer.draw_status(
+            f'Turn {turn} | Player {player_id} | Score {score} | '
+            f'{goal.description()}')
+        sink.write(self._renderer.screen())
+
+    def _draw_board(self, board: Block) -> None:
+        """Draw <board>, listing its squares or rasterizing it only if it has
+        changed since it was last drawn.
+        """
+        if self._drawn[0] != board.version:
+            drawing = _block_to_squares(board)
+            if self._raster:
+                drawing = raster_squares(drawing, board.size)
+            self._drawn = (board.version, drawing)
+        self._show()
+
+    def _show(self) -> None:
+        """Draw the board as it was last drawn by _draw_board.
+        """
+        if self._raster:
+            self._renderer.draw_pixels(self._drawn[1])
+        else:
+            self._renderer.draw_board(self._drawn[1])
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['write'],
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'os', 'shutil', 'pygame',
+            'actions', 'blocky', 'block', 'moves', 'raster', 'renderer',
+            'replay', 'settings'
+        ],
+        'generated-members': 'pygame.*'
+    })
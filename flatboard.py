@@ -0,0 +1,488 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the FlatBoard class, a compact alternative to a tree of
+Block objects that stores a whole board in a single flat buffer, and the
+BoardBatch class, which stores many such boards back to back.
+"""
+from __future__ import annotations
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import math
+import random
+
+from block import Block
+from settings import BOARD_SIZE, COLOUR_LIST, COLOUR_INDEX
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The code of a node that has been subdivided into four children.
+SPLIT = 254
+# The code of a node that is not part of the board, because one of its
+# ancestors is a leaf.
+EMPTY = 255
+
+# The permutation of the children of a node made by a swap or rotate: child i
+# after the move is child _PERMUTATIONS[action][i] before it.
+_PERMUTATIONS = {
+    ('swap', 0): (1, 0, 3, 2),
+    ('swap', 1): (3, 2, 1, 0),
+    ('rotate', 1): (1, 2, 3, 0),
+    ('rotate', 3): (3, 0, 1, 2)
+}
+
+# Cache of the permutations of the descendants of a node that is rotated,
+# keyed by direction and the number of levels below the node.
+_ROTATIONS: Dict[Tuple[int, int], itemgetter] = {}
+
+
+def _first_node(level: int) -> int:
+    """Return the id of the first node at <level> in a FlatBoard.
+    """
+    return (4 ** level - 1) // 3
+
+
+def _rotation(direction: int, levels: int) -> itemgetter:
+    """Return a function that reorders the 4 ** <levels> descendants of a node
+    at <levels> below it, as they are when that node is rotated in
+    <direction>.
+
+    A rotation reorders the children of every node below the rotated one, so
+    each base 4 digit of a descendant's position is permuted.
+    """
+    key = (direction, levels)
+    if key not in _ROTATIONS:
+        permutation = _PERMUTATIONS[('rotate', direction)]
+        order = [0]
+        for _ in range(levels):
+            order = [old * 4 + permutation[digit] for old in order
+                     for digit in range(4)]
+        _ROTATIONS[key] = itemgetter(*order)
+    return _ROTATIONS[key]
+
+
+class FlatBoard:
+    """A Blocky board stored as a complete quadtree in a flat buffer.
+
+    Nodes are identified by an id. The root is node 0, and the children of
+    node i are nodes 4i + 1, 4i + 2, 4i + 3 and 4i + 4, in the same order as
+    the children of a Block. Every possible node of a board of <max_depth> has
+    a byte in the buffer, whether it is part of the board or not, so copying a
+    board is a single buffer copy.
+
+    The descendants of a node that are k levels below it have consecutive ids,
+    so moves that rearrange a subtree move whole slices of the buffer.
+
+    === Public Attributes ===
+    max_depth:
+        The deepest level allowed in the board.
+
+    === Representation Invariants ===
+    - Each node's code is an index into COLOUR_LIST if it is a leaf, SPLIT if
+      it has children, or EMPTY if it is below a leaf.
+    - The root is not EMPTY.
+    - Nodes at max_depth are not SPLIT.
+    """
+    # === Private Attributes ===
+    # _nodes:
+    #   The code of each node, indexed by node id.
+    max_depth: int
+    _nodes: bytearray
+
+    def __init__(self, max_depth: int, nodes: Optional[bytearray] = None) \
+            -> None:
+        """Initialize a board of <max_depth> with the node codes in <nodes>.
+
+        If <nodes> is None, the board is a single leaf of the first colour in
+        COLOUR_LIST.
+        """
+        self.max_depth = max_depth
+        if nodes is None:
+            nodes = bytearray([EMPTY]) * _first_node(max_depth + 1)
+            nodes[0] = 0
+        self._nodes = nodes
+
+    @staticmethod
+    def from_block(block: Block) -> FlatBoard:
+        """Return a FlatBoard with the same structure and colours as the tree
+        rooted at <block>.
+
+        Precondition: every leaf colour of <block> is in COLOUR_LIST.
+        """
+        board = FlatBoard(block.max_depth - block.level)
+        stack = [(block, 0)]
+        while stack:
+            current, node = stack.pop()
+            if current.children:
+                board._nodes[node] = SPLIT
+                for i, child in enumerate(current.children):
+                    stack.append((child, 4 * node + 1 + i))
+            else:
+                board._nodes[node] = COLOUR_INDEX[current.colour]
+        return board
+
+    def to_block(self, position: Tuple[int, int], size: int) -> Block:
+        """Return a new tree of Blocks equivalent to this board, with its upper
+        left corner at <position> and dimensions of <size> by <size>.
+
+        Children are laid out in the same way as by Block.smash.
+        """
+        return self._to_block(0, 0, position, size)
+
+    def _to_block(self, node: int, level: int, position: Tuple[int, int],
+                  size: int) -> Block:
+        """Return a new tree of Blocks equivalent to the subtree at <node>,
+        which is at <level>.
+        """
+        code = self._nodes[node]
+        if code != SPLIT:
+            return Block(position, size, COLOUR_LIST[code], level,
+                         self.max_depth)
+
+        block = Block(position, size, None, level, self.max_depth)
+        half = size // 2
+        x, y = position
+        positions = [(x + half, y), (x, y), (x, y + half),
+                     (x + half, y + half)]
+        block.children = [self._to_block(4 * node + 1 + i, level + 1,
+                                         positions[i], half)
+                          for i in range(4)]
+        return block
+
+    def copy(self) -> FlatBoard:
+        """Return an independent copy of this board.
+        """
+        return FlatBoard(self.max_depth, bytearray(self._nodes))
+
+    def to_bytes(self) -> bytes:
+        """Return the node codes of this board.
+
+        FlatBoard(max_depth, bytearray(board.to_bytes())) is a copy of
+        <board>.
+        """
+        return bytes(self._nodes)
+
+    def __eq__(self, other: FlatBoard) -> bool:
+        """Return True iff this board and <other> have the same depth,
+        structure and colours.
+        """
+        return self.max_depth == other.max_depth and \
+            self._nodes == other._nodes
+
+    def __len__(self) -> int:
+        """Return the number of nodes that are part of this board.
+        """
+        return len(self._nodes) - self._nodes.count(EMPTY)
+
+    @staticmethod
+    def level(node: int) -> int:
+        """Return the level of <node>.
+        """
+        level = 0
+        while node >= _first_node(level + 1):
+            level += 1
+        return level
+
+    @staticmethod
+    def child(node: int, index: int) -> int:
+        """Return the id of the child of <node> at <index>.
+        """
+        return 4 * node + 1 + index
+
+    @staticmethod
+    def node_at(path: List[int]) -> int:
+        """Return the id of the node reached from the root by following the
+        child indexes in <path>.
+        """
+        node = 0
+        for index in path:
+            node = 4 * node + 1 + index
+        return node
+
+    def is_leaf(self, node: int) -> bool:
+        """Return True iff <node> is part of this board and has no children.
+        """
+        return self._nodes[node] < SPLIT
+
+    def colour(self, node: int) -> Optional[Tuple[int, int, int]]:
+        """Return the colour of <node> if it is a leaf, and None otherwise.
+        """
+        code = self._nodes[node]
+        return COLOUR_LIST[code] if code < SPLIT else None
+
+    def leaves(self) -> List[Tuple[int, int]]:
+        """Return the id and colour index of every leaf on this board.
+        """
+        return [(node, code) for node, code in enumerate(self._nodes)
+                if code < SPLIT]
+
+    def _subtree_levels(self, node: int) -> List[Tuple[int, int, int]]:
+        """Return a (start, end, levels) slice of the buffer for each level of
+        the subtree below <node>, where levels is how far below <node> that
+        level is.
+        """
+        result = []
+        first = node
+        for levels in range(1, self.max_depth - self.level(node) + 1):
+            first = 4 * first + 1
+            result.append((first, first + 4 ** levels, levels))
+        return result
+
+    def swap(self, node: int, direction: int) -> bool:
+        """Swap the children of <node>, like Block.swap.
+
+        Return True iff the swap was performed.
+        """
+        if self._nodes[node] != SPLIT:
+            return False
+        permutation = _PERMUTATIONS[('swap', direction)]
+        for start, end, levels in self._subtree_levels(node):
+            quarter = 4 ** (levels - 1)
+            old = self._nodes[start:end]
+            self._nodes[start:end] = b''.join(
+                old[i * quarter:(i + 1) * quarter] for i in permutation)
+        return True
+
+    def rotate(self, node: int, direction: int) -> bool:
+        """Rotate <node> and all its descendants, like Block.rotate.
+
+        Return True iff the rotation was performed.
+        """
+        if self._nodes[node] != SPLIT:
+            return False
+        for start, end, levels in self._subtree_levels(node):
+            old = self._nodes[start:end]
+            self._nodes[start:end] = bytes(_rotation(direction, levels)(old))
+        return True
+
+    def smash(self, node: int, rng: Optional[random.Random] = None) -> bool:
+        """Sub-divide <node> into four randomly generated children, like
+        Block.smash, drawing from <rng> in the same order. If <rng> is None,
+        the random module is used.
+
+        Return True iff the smash was performed.
+        """
+        level = self.level(node)
+        if self._nodes[node] >= SPLIT or level == self.max_depth:
+            return False
+        self._smash(node, level, random if rng is None else rng)
+        return True
+
+    def _smash(self, node: int, level: int, rng: random.Random) -> None:
+        """Sub-divide the leaf <node> at <level>, which is above max_depth,
+        drawing random numbers from <rng>.
+        """
+        self._nodes[node] = SPLIT
+        num = rng.random()
+        for i in range(4):
+            child = 4 * node + 1 + i
+            self._nodes[child] = COLOUR_INDEX[rng.choice(COLOUR_LIST)]
+            if num < math.exp(-0.25 * level) and level + 1 < self.max_depth:
+                self._smash(child, level + 1, rng)
+
+    def paint(self, node: int, colour: Tuple[int, int, int]) -> bool:
+        """Change the colour of <node> to <colour> iff it is a leaf at
+        max_depth with a different colour, like Block.paint.
+
+        Return True iff the colour was changed.
+        """
+        code = COLOUR_INDEX[colour]
+        if self.level(node) != self.max_depth or \
+                self._nodes[node] in (code, EMPTY):
+            return False
+        self._nodes[node] = code
+        return True
+
+    def combine(self, node: int) -> bool:
+        """Turn <node> into a leaf of the majority colour of its children, like
+        Block.combine.
+
+        Return True iff <node> was turned into a leaf.
+        """
+        if self.level(node) != self.max_depth - 1 or \
+                self._nodes[node] != SPLIT:
+            return False
+
+        first = 4 * node + 1
+        codes = list(self._nodes[first:first + 4])
+        counts = [codes.count(code) for code in codes]
+        maximum = max(counts)
+        if maximum < 2 or min(counts) == maximum:
+            return False
+        self._nodes[node] = codes[counts.index(maximum)]
+        self._nodes[first:first + 4] = bytes([EMPTY] * 4)
+        return True
+
+
+def _generate_codes(num_boards: int, max_depth: int, rng: random.Random) \
+        -> bytearray:
+    """Return the node codes of <num_boards> random boards of <max_depth>, one
+    after another, generated one board at a time.
+
+    Each board is the same as generate_board would make from the same draws
+    of <rng>.
+    """
+    codes = bytearray()
+    for _ in range(num_boards):
+        board = FlatBoard(max_depth)
+        board._nodes[0] = COLOUR_INDEX[rng.choice(COLOUR_LIST)]
+        board.smash(0, rng)
+        codes += board._nodes
+    return codes
+
+
+def _generate_array(num_boards: int, max_depth: int, seed: int) \
+        -> np.ndarray:
+    """Return the node codes of <num_boards> random boards of <max_depth>, one
+    after another in a flat uint8 array, generated a level at a time for every
+    board at once by a NumPy generator seeded with <seed>.
+
+    The boards follow the same distribution as those made by generate_board:
+    the root is split, every child gets a random colour, and the children of
+    a split block at level L are all split, with probability exp(-0.25 * L),
+    if they are above max_depth.
+
+    Precondition: NumPy is available.
+    """
+    generator = np.random.default_rng(seed)
+    codes = np.full((num_boards, _first_node(max_depth + 1)), EMPTY,
+                    dtype=np.uint8)
+    if max_depth == 0:
+        codes[:, 0] = generator.integers(len(COLOUR_LIST), size=num_boards)
+        return codes.reshape(-1)
+
+    codes[:, 0] = SPLIT
+    for level in range(max_depth):
+        start, end = _first_node(level), _first_node(level + 1)
+        # The children of the nodes at <level> are the nodes at the next level,
+        # in the same order, so each node's split flag is repeated 4 times.
+        split = codes[:, start:end] == SPLIT
+        colours = generator.integers(len(COLOUR_LIST),
+                                     size=(num_boards, 4 * (end - start)),
+                                     dtype=np.uint8)
+        children = np.where(np.repeat(split, 4, axis=1), colours,
+                            np.uint8(EMPTY))
+        if level + 1 < max_depth:
+            smashed = split & (generator.random(split.shape) <
+                               math.exp(-0.25 * level))
+            children[np.repeat(smashed, 4, axis=1)] = SPLIT
+        codes[:, end:_first_node(level + 2)] = children
+    return codes.reshape(-1)
+
+
+def generate_boards(num_boards: int, max_depth: int,
+                    rng: Optional[random.Random] = None) -> BoardBatch:
+    """Return a batch of <num_boards> random boards of <max_depth>, with the
+    same distribution as boards made by generate_board.
+
+    When NumPy is available, every board is generated at once by a NumPy
+    generator seeded from <rng>. Otherwise, the boards are generated one at a
+    time, drawing from <rng>. If <rng> is None, the random module is used.
+
+    >>> batch = generate_boards(3, 2, random.Random(148))
+    >>> len(batch)
+    3
+    >>> batch[0].max_depth
+    2
+    """
+    if rng is None:
+        rng = random
+    if np is None:
+        codes = _generate_codes(num_boards, max_depth, rng)
+    else:
+        codes = _generate_array(num_boards, max_depth, rng.getrandbits(64))
+    return BoardBatch(max_depth, codes)
+
+
+class BoardBatch:
+    """A sequence of boards of the same max_depth, stored as the node codes of
+    one FlatBoard after another in a single buffer.
+
+    Indexing a batch builds a new tree of Blocks for that board, so boards
+    only take up the space of a Block tree while they are in use.
+
+    === Public Attributes ===
+    max_depth:
+        The deepest level allowed in every board of the batch.
+    codes:
+        The node codes of every board, as a flat NumPy uint8 array when NumPy
+        is available, or a bytearray otherwise. The codes of board i are at
+        i * n to (i + 1) * n, where n is the number of nodes in each board.
+    """
+    # === Private Attributes ===
+    # _num_nodes:
+    #   The number of nodes in each board.
+    max_depth: int
+    codes: Union[bytearray, np.ndarray]
+    _num_nodes: int
+
+    def __init__(self, max_depth: int,
+                 codes: Union[bytearray, np.ndarray]) -> None:
+        """Initialize a batch of the boards of <max_depth> whose node codes are
+        in <codes>.
+
+        Precondition: len(codes) is a multiple of the number of nodes in a
+        FlatBoard of <max_depth>.
+        """
+        self.max_depth = max_depth
+        self.codes = codes
+        self._num_nodes = _first_node(max_depth + 1)
+
+    def __len__(self) -> int:
+        """Return the number of boards in this batch.
+        """
+        return len(self.codes) // self._num_nodes
+
+    def flat(self, index: int) -> FlatBoard:
+        """Return a new FlatBoard that is a copy of the board at <index>.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('board index out of range')
+        start = index * self._num_nodes
+        return FlatBoard(self.max_depth,
+                         bytearray(self.codes[start:start + self._num_nodes]))
+
+    def __getitem__(self, index: int) -> Block:
+        """Return a new tree of Blocks equivalent to the board at <index>, with
+        its upper left corner at (0, 0) and dimensions of BOARD_SIZE.
+        """
+        return self.flat(index).to_block((0, 0), BOARD_SIZE)
+
+    def __iter__(self) -> Iterator[Block]:
+        """Yield a new tree of Blocks for each board in this batch, in order.
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'operator', 'numpy', 'block', 'settings'
+        ],
+        'max-attributes': 15
+    })
@@ -25,7 +25,7 @@ Blocky game.
 At the bottom of the file, there are some function that you
 can call to try playing the game in several different configurations.
 """
-from typing import List
+from typing import BinaryIO, List, Optional
 import pygame
 
 from block import generate_board
@@ -52,9 +52,12 @@ class Game:
     def __init__(self, max_depth: int,
                  num_human: int,
                  num_random: int,
-                 smart_players: List[int]) -> None:
+                 smart_players: List[int],
+                 replay: Optional[BinaryIO] = None) -> None:
         """Initialize this game, as described in the Assignment 2 handout.
 
+        If <replay> is not None, the game is recorded to it as it is played.
+
         Precondition:
             2 <= max_depth <= 5
         """
@@ -62,7 +65,8 @@ class Game:
         players = create_players(num_human, num_random, smart_players)
 
         self._renderer = Renderer(BOARD_SIZE)
-        self._data = GameData(board, players)
+        self._renderer.cache_images(max_depth)
+        self._data = GameData(board, players, replay)
         self._state = MainState(self._data)
 
     def run_game(self, num_turns: int) -> None:
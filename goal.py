@@ -22,29 +22,52 @@ Misha Schwartz, and Jaisie Sin
 This file contains the hierarchy of Goal classes.
 """
 from __future__ import annotations
-import math
 import random
-from typing import List, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 from block import Block
-from settings import colour_name, COLOUR_LIST
+from settings import colour_name, COLOUR_LIST, COLOUR_INDEX
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def generate_goals(num_goals: int) -> List[Goal]:
+# Boards at least this many levels deep are scored on a NumPy array of palette
+# indexes, when NumPy is available, unless their subtree summaries are cached.
+# Shallower boards are cheaper to score on flattened lists.
+ARRAY_MIN_DEPTH = 5
+
+# The kinds of subtree summary that goals are scored from, which key them in
+# Block.cached.
+_PERIMETER = 'perimeter'
+_BLOB = 'blob'
+
+# The palette index given to unit cells whose colour is not in COLOUR_LIST.
+_NO_COLOUR = 255
+
+
+def generate_goals(num_goals: int,
+                   rng: Optional[random.Random] = None) -> List[Goal]:
     """Return a randomly generated list of goals with length num_goals.
 
     All elements of the list must be the same type of goal, but each goal
     must have a different randomly generated colour from COLOUR_LIST. No two
     goals can have the same colour.
 
+    Random numbers are drawn from <rng>, or from the random module if <rng> is
+    None.
+
     Precondition:
         - num_goals <= len(COLOUR_LIST)
     """
+    if rng is None:
+        rng = random
     final = []
     index = []
     possible = [PerimeterGoal, BlobGoal]
-    x = random.choice(possible)
+    x = rng.choice(possible)
     while len(index) < num_goals:
-        num = random.randint(0, len(COLOUR_LIST)-1)
+        num = rng.randint(0, len(COLOUR_LIST)-1)
         if num not in index:
             index.append(num)
     for y in index:
@@ -55,20 +78,25 @@ def generate_goals(num_goals: int) -> List[Goal]:
     return final
 
 
-def _flatten_help(block: Block, loc: Tuple[int, int]) -> Tuple[int, int, int]:
-    """ Returns the colour of the block at <loc> location.
+def _flatten_into(block: Block, grid: List[List[Tuple[int, int, int]]],
+                  x: int, y: int) -> None:
+    """Fill the unit cells of <grid> that are covered by <block>.
+
+    <x> and <y> are the column and row of the unit cell in the upper left
+    corner of <block>. Each leaf fills its whole region at once, so the tree is
+    only walked once.
     """
-    mid = int(math.pow(2, block.max_depth - block.level - 1))
     if not block.children:
-        return block.colour
-    elif loc[0] >= mid > loc[1]:
-        return _flatten_help(block.children[0], (loc[0] - mid, loc[1]))
-    elif loc[0] < mid and loc[1] < mid:
-        return _flatten_help(block.children[1], (loc[0], loc[1]))
-    elif loc[0] < mid <= loc[1]:
-        return _flatten_help(block.children[2], (loc[0], loc[1] - mid))
+        span = 2 ** (block.max_depth - block.level)
+        run = [block.colour] * span
+        for i in range(x, x + span):
+            grid[i][y:y + span] = run
     else:
-        return _flatten_help(block.children[3], (loc[0] - mid, loc[1] - mid))
+        mid = 2 ** (block.max_depth - block.level - 1)
+        _flatten_into(block.children[0], grid, x + mid, y)
+        _flatten_into(block.children[1], grid, x, y)
+        _flatten_into(block.children[2], grid, x, y + mid)
+        _flatten_into(block.children[3], grid, x + mid, y + mid)
 
 
 def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
@@ -85,16 +113,327 @@ def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
 
     L[0][0] represents the unit cell in the upper left corner of the Block.
     """
-    size = int(math.pow(2, block.max_depth - block.level))
-    final = []
-    for i in range(size):
-        x = []
-        for j in range(size):
-            x.append(_flatten_help(block, (i, j)))
-        final.append(x)
+    size = 2 ** (block.max_depth - block.level)
+    final = [[None] * size for _ in range(size)]
+    _flatten_into(block, final, 0, 0)
     return final
 
 
+def _largest_blob(target: List[bool], size: int) -> int:
+    """Return the number of cells in the largest connected blob of True cells
+    in <target>.
+
+    <target> holds the cells of a <size> by <size> grid, column by column, so
+    the cell at column i and row j is target[i * size + j]. The search uses an
+    explicit stack, so it is not limited by Python's recursion depth.
+    """
+    seen = bytearray(len(target))
+    last = size - 1
+    maximum = 0
+    for start, is_target in enumerate(target):
+        if not is_target or seen[start]:
+            continue
+        seen[start] = 1
+        stack = [start]
+        count = 0
+        while stack:
+            cell = stack.pop()
+            count += 1
+            x, y = divmod(cell, size)
+            if y > 0 and target[cell - 1] and not seen[cell - 1]:
+                seen[cell - 1] = 1
+                stack.append(cell - 1)
+            if y < last and target[cell + 1] and not seen[cell + 1]:
+                seen[cell + 1] = 1
+                stack.append(cell + 1)
+            if x > 0 and target[cell - size] and not seen[cell - size]:
+                seen[cell - size] = 1
+                stack.append(cell - size)
+            if x < last and target[cell + size] and not seen[cell + size]:
+                seen[cell + size] = 1
+                stack.append(cell + size)
+        maximum = max(maximum, count)
+    return maximum
+
+
+def _use_array(board: Block, colour: Tuple[int, int, int]) -> bool:
+    """Return True iff a goal of <colour> should score <board> using NumPy.
+    """
+    return np is not None and colour in COLOUR_INDEX and \
+        board.max_depth - board.level >= ARRAY_MIN_DEPTH
+
+
+# Leaves at most this many unit cells wide are written to the NumPy grid in one
+# operation for each width. Wider leaves are fewer, and cheaper to write one
+# slice at a time.
+_GROUPED_SPAN = 4
+
+
+def _flatten_array(block: Block) -> np.ndarray:
+    """Return a two-dimensional uint8 array A representing <block> as columns
+    and rows of unit cells, laid out like the result of _flatten.
+
+    A[i, j] is the index in COLOUR_LIST of the colour of the unit cell at
+    column i and row j, or _NO_COLOUR if that colour is not in COLOUR_LIST.
+
+    The leaves are listed by width in a single tree walk, and the narrow ones
+    are then written to the array together, since most leaves of a deep board
+    are only a few cells wide.
+
+    Precondition: NumPy is available.
+    """
+    size = 2 ** (block.max_depth - block.level)
+    grid = np.empty((size, size), dtype=np.uint8)
+    leaves = {}
+    stack = [(block, 0, 0, size)]
+    while stack:
+        current, x, y, span = stack.pop()
+        children = current.children
+        if not children:
+            if span not in leaves:
+                leaves[span] = ([], [], [])
+            columns, rows, indexes = leaves[span]
+            columns.append(x)
+            rows.append(y)
+            indexes.append(COLOUR_INDEX.get(current.colour, _NO_COLOUR))
+        else:
+            mid = span // 2
+            stack.append((children[0], x + mid, y, mid))
+            stack.append((children[1], x, y, mid))
+            stack.append((children[2], x, y + mid, mid))
+            stack.append((children[3], x + mid, y + mid, mid))
+
+    for span, (columns, rows, indexes) in leaves.items():
+        if span > _GROUPED_SPAN:
+            for x, y, index in zip(columns, rows, indexes):
+                grid[x:x + span, y:y + span] = index
+        else:
+            offsets = np.arange(span)
+            grid[np.add.outer(columns, offsets)[:, :, None],
+                 np.add.outer(rows, offsets)[:, None, :]] = \
+                np.array(indexes, dtype=np.uint8)[:, None, None]
+    return grid
+
+
+def _perimeter_score_array(grid: np.ndarray, index: int) -> int:
+    """Return the PerimeterGoal score on the flattened <grid> for the colour at
+    <index> in COLOUR_LIST.
+
+    Corner cells count twice, just like in PerimeterGoal.score.
+    """
+    target = grid == index
+    corners = target[[0, 0, -1, -1], [0, -1, 0, -1]].sum()
+    edges = target[0, 1:-1].sum() + target[-1, 1:-1].sum() + \
+        target[1:-1, 0].sum() + target[1:-1, -1].sum()
+    return int(2 * corners + edges)
+
+
+def _blob_score_array(grid: np.ndarray, index: int) -> int:
+    """Return the size of the largest blob on the flattened <grid> of the
+    colour at <index> in COLOUR_LIST.
+
+    The target cells of each column are first grouped into vertical runs.
+    Runs in neighbouring columns that share a row are then merged into
+    components by repeatedly hooking each component onto the smallest label it
+    touches and compressing the labels.
+    """
+    target = grid == index
+    if not target.any():
+        return 0
+
+    starts = target.copy()
+    starts[:, 1:] &= ~target[:, :-1]
+    runs = np.cumsum(starts, axis=None).reshape(target.shape)
+    runs[~target] = 0
+    run_sizes = np.bincount(runs.ravel())
+    run_sizes[0] = 0
+
+    touching = target[:-1] & target[1:]
+    left = runs[:-1][touching]
+    right = runs[1:][touching]
+
+    labels = np.arange(len(run_sizes))
+    while len(left) > 0:
+        low = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, labels[left], low)
+        np.minimum.at(labels, labels[right], low)
+        jumped = labels[labels]
+        while not np.array_equal(jumped, labels):
+            labels = jumped
+            jumped = labels[labels]
+        if np.array_equal(labels[left], labels[right]):
+            break
+
+    return int(np.bincount(labels, weights=run_sizes).max())
+
+
+def _summarized(board: Block, key: Hashable) -> bool:
+    """Return True iff <board> or one of its children still has a summary
+    cached under <key>.
+
+    A board that was summarized before its last few moves keeps the summaries
+    of the blocks those moves did not change, so it is cheaper to score from
+    summaries again than to flatten. On any other board, summarizing every
+    block costs several times as much as flattening it once.
+    """
+    return board.has_cached(key) or \
+        any(child.has_cached(key) for child in board.children)
+
+
+def _perimeter_summary(block: Block, colour: Tuple[int, int, int]) \
+        -> Tuple[int, int, int, int]:
+    """Return the number of unit cells of <colour> along the top, right,
+    bottom and left sides of <block>, in that order.
+
+    Summaries are cached on each block, so after a move only the moved block
+    and its ancestors are summarized again.
+    """
+    return block.cached((_PERIMETER, colour),
+                        lambda b: _compute_perimeter_summary(b, colour))
+
+
+def _compute_perimeter_summary(block: Block, colour: Tuple[int, int, int]) \
+        -> Tuple[int, int, int, int]:
+    """Return the perimeter summary of <block> for <colour>, from the cached
+    summaries of its children.
+    """
+    if not block.children:
+        span = 2 ** (block.max_depth - block.level)
+        count = span if block.colour == colour else 0
+        return count, count, count, count
+    upper_right, upper_left, lower_left, lower_right = \
+        [_perimeter_summary(child, colour) for child in block.children]
+    return (upper_left[0] + upper_right[0], upper_right[1] + lower_right[1],
+            lower_left[2] + lower_right[2], upper_left[3] + lower_left[3])
+
+
+def _blob_summary(block: Block, colour: Tuple[int, int, int]) \
+        -> Tuple[int, List[int], tuple, tuple, tuple, tuple]:
+    """Return a summary of the blobs of <colour> within <block>.
+
+    The summary is the size of the largest blob that does not touch the
+    sides of <block>, the sizes of the blobs that do, indexed by label from 1,
+    and the top, right, bottom and left sides of <block> as runs of
+    (length, label), where label 0 is a run of cells of other colours.
+    Summaries are cached on each block, like perimeter summaries.
+    """
+    return block.cached((_BLOB, colour),
+                        lambda b: _compute_blob_summary(b, colour))
+
+
+def _find(parent: List[int], label: int) -> int:
+    """Return the representative of <label> in the union-find forest
+    <parent>.
+    """
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+    return label
+
+
+def _join_side(parent: List[int], first: tuple, first_offset: int,
+               second: tuple, second_offset: int) -> None:
+    """Union the labels of the touching runs of two sides of the same length
+    that lie against each other.
+
+    Each side's labels are shifted by its offset before they are unioned.
+    """
+    i = j = 0
+    length, label = first[0]
+    other_length, other_label = second[0]
+    while True:
+        if label and other_label:
+            a = _find(parent, label + first_offset)
+            b = _find(parent, other_label + second_offset)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        step = min(length, other_length)
+        length -= step
+        other_length -= step
+        if length == 0:
+            i += 1
+            if i == len(first):
+                return
+            length, label = first[i]
+        if other_length == 0:
+            j += 1
+            other_length, other_label = second[j]
+
+
+def _relabel_side(runs: List[Tuple[int, int]], labels: Dict[int, int],
+                  parent: List[int], parts: List[Tuple[tuple, int]]) -> tuple:
+    """Return the side made of <parts>, which are sides of children and the
+    offsets of their labels, with each label replaced by a new label for its
+    component and neighbouring runs of the same label joined.
+
+    <labels> maps each component's representative to its new label, and is
+    extended with new components as they are found. <runs> is a scratch list.
+    """
+    runs.clear()
+    for side, offset in parts:
+        for length, label in side:
+            if label:
+                root = _find(parent, label + offset)
+                if root not in labels:
+                    labels[root] = len(labels) + 1
+                label = labels[root]
+            if runs and runs[-1][1] == label:
+                runs[-1] = (runs[-1][0] + length, label)
+            else:
+                runs.append((length, label))
+    return tuple(runs)
+
+
+def _compute_blob_summary(block: Block, colour: Tuple[int, int, int]) \
+        -> Tuple[int, List[int], tuple, tuple, tuple, tuple]:
+    """Return the blob summary of <block> for <colour>, by joining the cached
+    summaries of its children along the seams between them.
+    """
+    if not block.children:
+        span = 2 ** (block.max_depth - block.level)
+        if block.colour == colour:
+            side = ((span, 1),)
+            return 0, [0, span * span], side, side, side, side
+        side = ((span, 0),)
+        return 0, [0], side, side, side, side
+
+    children = [_blob_summary(child, colour) for child in block.children]
+    offsets = []
+    sizes = [0]
+    for child in children:
+        offsets.append(len(sizes) - 1)
+        sizes.extend(child[1][1:])
+    parent = list(range(len(sizes)))
+
+    (ur, ul, ll, lr), (our, oul, oll, olr) = children, offsets
+    _join_side(parent, ul[3], oul, ur[5], our)
+    _join_side(parent, ll[3], oll, lr[5], olr)
+    _join_side(parent, ul[4], oul, ll[2], oll)
+    _join_side(parent, ur[4], our, lr[2], olr)
+
+    totals = [0] * len(sizes)
+    for label in range(1, len(sizes)):
+        totals[_find(parent, label)] += sizes[label]
+
+    labels = {}
+    runs = []
+    top = _relabel_side(runs, labels, parent, [(ul[2], oul), (ur[2], our)])
+    right = _relabel_side(runs, labels, parent, [(ur[3], our), (lr[3], olr)])
+    bottom = _relabel_side(runs, labels, parent, [(ll[4], oll), (lr[4], olr)])
+    left = _relabel_side(runs, labels, parent, [(ul[5], oul), (ll[5], oll)])
+
+    best = max(child[0] for child in children)
+    new_sizes = [0] * (len(labels) + 1)
+    for root in range(1, len(sizes)):
+        if parent[root] != root:
+            continue
+        if root in labels:
+            new_sizes[labels[root]] = totals[root]
+        else:
+            best = max(best, totals[root])
+    return best, new_sizes, top, right, bottom, left
+
+
 class Goal:
     """A player goal in the game of Blocky.
 
@@ -116,6 +455,29 @@ class Goal:
         """Return the current score for this goal on the given board.
 
         The score is always greater than or equal to 0.
+
+        A board that still has subtree summaries cached by incremental_score
+        is scored from them. Any other board is flattened, so scoring it
+        leaves nothing cached on its blocks.
+        """
+        raise NotImplementedError
+
+    def incremental_score(self, board: Block) -> int:
+        """Return the current score for this goal on the given board, from
+        summaries of its subtrees that are cached on its blocks.
+
+        The first call summarizes every block, which takes several times as
+        long as score, and the summaries take a lot of memory on deep boards.
+        After a move, only the changed block and its ancestors are summarized
+        again, so this is much faster than score for rescoring a board as
+        moves are tried on it.
+        """
+        raise NotImplementedError
+
+    def flattened_score(self, flattened: List[List[Tuple[int, int, int]]]) \
+            -> int:
+        """Return the current score for this goal on a board that has already
+        been flattened into <flattened>, as returned by _flatten.
         """
         raise NotImplementedError
 
@@ -135,7 +497,22 @@ class PerimeterGoal(Goal):
         this goal applies.
     """
     def score(self, board: Block) -> int:
-        f = _flatten(board)
+        if _summarized(board, (_PERIMETER, self.colour)):
+            return self.incremental_score(board)
+        if _use_array(board, self.colour):
+            return _perimeter_score_array(_flatten_array(board),
+                                          COLOUR_INDEX[self.colour])
+        return self.flattened_score(_flatten(board))
+
+    def incremental_score(self, board: Block) -> int:
+        if board.level == board.max_depth:
+            # The only cell is all four corners at once.
+            return 8 if board.colour == self.colour else 0
+        return sum(_perimeter_summary(board, self.colour))
+
+    def flattened_score(self, flattened: List[List[Tuple[int, int, int]]]) \
+            -> int:
+        f = flattened
         total = 0
         last_pos = len(f) - 1
         if f[0][0] == self.colour:
@@ -175,24 +552,22 @@ class BlobGoal(Goal):
         this goal applies.
     """
     def score(self, board: Block) -> int:
-        flattened_board = _flatten(board)
-        length = 2 ** board.max_depth
-        visit_list = []
-        for i in range(length):
-            x = []
-            for j in range(length):
-                x.append(-1)
-            visit_list.append(x)
-
-        maximum = 0
-        for i in range(len(visit_list)):
-            for j in range(len(visit_list)):
-                if visit_list[i][j] == -1:
-                    score_tots = self._undiscovered_blob_size((i, j),
-                                                              flattened_board,
-                                                              visit_list)
-                    maximum = max(maximum, score_tots)
-        return maximum
+        if _summarized(board, (_BLOB, self.colour)):
+            return self.incremental_score(board)
+        if _use_array(board, self.colour):
+            return _blob_score_array(_flatten_array(board),
+                                     COLOUR_INDEX[self.colour])
+        return self.flattened_score(_flatten(board))
+
+    def incremental_score(self, board: Block) -> int:
+        best, sizes = _blob_summary(board, self.colour)[:2]
+        return max(best, max(sizes))
+
+    def flattened_score(self, flattened: List[List[Tuple[int, int, int]]]) \
+            -> int:
+        target = [cell == self.colour for column in flattened
+                  for cell in column]
+        return _largest_blob(target, len(flattened))
 
     def _undiscovered_blob_size(self, pos: Tuple[int, int],
                                 board: List[List[Tuple[int, int, int]]],
@@ -214,23 +589,22 @@ class BlobGoal(Goal):
         Update <visited> so that all cells that are visited are marked with
         either 0 or 1.
         """
-        x = pos[0]
-        y = pos[1]
-        total = 1
-        if x < 0 or x >= len(board) or y < 0 or y >= len(board):
-            return 0
-        elif visited[x][y] == 0 or visited[x][y] == 1:
-            return 0
-        elif board[x][y] != self.colour:
-            visited[x][y] = 0
-            return 0
-        else:
-            visited[x][y] = 1
-            total += self._undiscovered_blob_size((x, y - 1), board, visited)
-            total += self._undiscovered_blob_size((x + 1, y), board, visited)
-            total += self._undiscovered_blob_size((x, y + 1), board, visited)
-            total += self._undiscovered_blob_size((x - 1, y), board, visited)
-            return total
+        total = 0
+        stack = [pos]
+        while stack:
+            x, y = stack.pop()
+            if x < 0 or x >= len(board) or y < 0 or y >= len(board):
+                continue
+            elif visited[x][y] == 0 or visited[x][y] == 1:
+                continue
+            elif board[x][y] != self.colour:
+                visited[x][y] = 0
+            else:
+                visited[x][y] = 1
+                total += 1
+                stack.extend([(x - 1, y), (x, y + 1), (x + 1, y),
+                              (x, y - 1)])
+        return total
 
     def description(self) -> str:
         x = "A player must aim to create a blob of connected " \
@@ -238,13 +612,80 @@ class BlobGoal(Goal):
         return x
 
 
+# The number of scores a TranspositionTable holds by default.
+TABLE_CAPACITY = 4096
+
+
+class TranspositionTable:
+    """A memo of goal scores, keyed by the goal and the structural hash of the
+    board they were computed on.
+
+    Boards reached by different sequences of moves, such as four rotations of
+    the same block or two identical swaps, share a hash, so each is only
+    scored once. A hash collision between two different boards would return
+    the wrong score, but this is vanishingly unlikely.
+
+    === Public Attributes ===
+    hits:
+        The number of scores that were found in the table.
+    misses:
+        The number of scores that had to be computed.
+    """
+    # === Private Attributes ===
+    # _capacity:
+    #   The most scores the table holds. When it is full, the oldest score is
+    #   forgotten to make room for a new one.
+    # _scores:
+    #   The memoized scores, keyed by goal class, goal colour and board hash,
+    #   from oldest to newest.
+    hits: int
+    misses: int
+    _capacity: int
+    _scores: Dict[Tuple[type, Tuple[int, int, int], int], int]
+
+    def __init__(self, capacity: int = TABLE_CAPACITY) -> None:
+        """Initialize an empty table that holds up to <capacity> scores.
+
+        Precondition: capacity >= 1
+        """
+        self.hits = 0
+        self.misses = 0
+        self._capacity = capacity
+        self._scores = {}
+
+    def __len__(self) -> int:
+        """Return the number of scores in this table.
+        """
+        return len(self._scores)
+
+    def score(self, goal: Goal, board: Block) -> int:
+        """Return the score of <goal> on <board>, computing it only if this
+        table has no score for <goal> on a board with the same structure as
+        <board>.
+
+        Scores are computed with incremental_score, since the boards a table
+        is used for are rescored as moves are tried on them.
+        """
+        key = (type(goal), goal.colour, hash(board))
+        if key in self._scores:
+            self.hits += 1
+            return self._scores[key]
+
+        self.misses += 1
+        if len(self._scores) >= self._capacity:
+            del self._scores[next(iter(self._scores))]
+        score = goal.incremental_score(board)
+        self._scores[key] = score
+        return score
+
+
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'block', 'settings',
-            'math', '__future__'
+            '__future__', 'numpy'
         ],
         'max-attributes': 15
     })
@@ -0,0 +1,289 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the MCTSEngine class, which chooses moves by Monte Carlo
+tree search: it plays many short random games from the current board and
+grows a tree of the moves that did best in them.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import math
+import random
+import time
+
+from actions import ACTION_PENALTY, PASS, SMASH
+from block import Block
+from goal import Goal
+from moves import MoveJournal, block_at, legal_moves, legal_paths
+
+# A move in the tree, with the path to its block in place of the block
+PathMove = Tuple[str, Optional[int], Tuple[int, ...]]
+
+
+class _Node:
+    """A position in the search tree.
+
+    === Public Attributes ===
+    mover:
+        The ID of the player whose turn it is at this position.
+    key:
+        The structural hash of the board at this position.
+    untried:
+        The moves from this position that do not have a child yet, in no
+        particular order, or None if they have not been listed yet.
+    children:
+        Each move from this position that has been tried, and the position it
+        leads to.
+    visits:
+        The number of playouts that passed through this position.
+    rewards:
+        The total reward of each player, indexed by player ID, over the
+        playouts that passed through this position.
+    """
+    __slots__ = ('mover', 'key', 'untried', 'children', 'visits', 'rewards')
+    mover: int
+    key: int
+    untried: Optional[List[PathMove]]
+    children: List[Tuple[PathMove, _Node]]
+    visits: int
+    rewards: List[float]
+
+    def __init__(self, mover: int, key: int, num_players: int) -> None:
+        """Initialize an unvisited position where it is <mover>'s turn, whose
+        moves have not been listed yet.
+        """
+        self.mover = mover
+        self.key = key
+        self.untried = None
+        self.children = []
+        self.visits = 0
+        self.rewards = [0.0] * num_players
+
+
+class MCTSEngine:
+    """A Monte Carlo tree search over the moves of every player.
+
+    Each playout walks down the tree by UCT, choosing at each position the
+    move with the best balance of average reward and uncertainty for the
+    player to move there. It then adds one new position, plays random moves
+    by the same rules as a RandomPlayer for <rollout_plies> more plies, and
+    credits every player with a reward: a share of 1 between the players with
+    the best goal score minus penalties, and 0 for the rest.
+
+    Moves in the tree refer to blocks by their path from the root, and are
+    made on the board itself and undone with a MoveJournal after each
+    playout. Smashes are only made in the random part of a playout, since the
+    tree cannot follow their random outcomes.
+
+    After a search, the positions one round of turns below the chosen move
+    are kept, keyed by the structural hash of their board. If the next search
+    starts from one of them, its statistics are reused.
+
+    === Public Attributes ===
+    goals:
+        The goal of each player, indexed by player ID.
+    playouts:
+        The most playouts in each search.
+    time_limit:
+        The most seconds each search may take, or None for no limit.
+    rollout_plies:
+        The number of random moves at the end of each playout.
+    exploration:
+        The weight given to uncertainty in UCT.
+    """
+    # === Private Attributes ===
+    # _next_roots:
+    #   The positions kept from the last search, keyed by board hash.
+    # _rng:
+    #   The random number generator that playouts draw from.
+    goals: List[Goal]
+    playouts: int
+    time_limit: Optional[float]
+    rollout_plies: int
+    exploration: float
+    _next_roots: Dict[int, _Node]
+    _rng: random.Random
+
+    def __init__(self, goals: List[Goal], playouts: int,
+                 time_limit: Optional[float] = None,
+                 rollout_plies: Optional[int] = None,
+                 exploration: float = math.sqrt(2),
+                 rng: Optional[random.Random] = None) -> None:
+        """Initialize an engine for a game between players with <goals>.
+
+        If <rollout_plies> is None, each playout ends with one random move per
+        player. Random numbers are drawn from <rng>, or from the random module
+        if <rng> is None.
+
+        Precondition:
+            - len(goals) >= 1
+            - playouts >= 1
+        """
+        self.goals = goals
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.rollout_plies = len(goals) if rollout_plies is None \
+            else rollout_plies
+        self.exploration = exploration
+        self._next_roots = {}
+        self._rng = random if rng is None else rng
+
+    def search(self, board: Block, player_id: int) \
+            -> Tuple[Tuple[str, Optional[int], Block], int]:
+        """Return the most visited move for the player with <player_id> on
+        <board>, and the number of playouts that the decision is based on,
+        including those reused from the last search.
+
+        <board> is left as it was.
+        """
+        root = self._next_roots.get(hash(board))
+        if root is None or root.mover != player_id:
+            root = _Node(player_id, hash(board), len(self.goals))
+        self._next_roots = {}
+
+        deadline = None if self.time_limit is None else \
+            time.perf_counter() + self.time_limit
+        for _ in range(self.playouts):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._playout(board, root)
+
+        if not root.children:
+            return PASS + (board,), root.visits
+        move, child = max(root.children, key=lambda item: item[1].visits)
+        self._keep(child)
+        return move[:2] + (block_at(board, move[2]),), root.visits
+
+    def _tree_moves(self, board: Block, mover: int) -> List[PathMove]:
+        """Return the moves <mover> may make in the tree from <board>: every
+        legal move other than a smash, and passing.
+        """
+        moves = [move for move in legal_paths(board, self.goals[mover].colour)
+                 if move[0] != SMASH[0]]
+        moves.append(PASS + ((),))
+        return moves
+
+    def _apply(self, journal: MoveJournal, board: Block, move: PathMove,
+               mover: int, penalties: List[int]) -> bool:
+        """Make the tree move <move> for <mover> on <board>, recording it in
+        <journal> and adding its penalty to <penalties>.
+
+        Return True iff the move was made.
+        """
+        block = block_at(board, move[2])
+        if block is None or \
+                not journal.apply(move[:2] + (block,),
+                                  self.goals[mover].colour):
+            return False
+        penalties[mover] += ACTION_PENALTY[move[:2]]
+        return True
+
+    def _select(self, node: _Node) -> Tuple[PathMove, _Node]:
+        """Return the child of <node> with the highest UCT value for the
+        player to move at <node>.
+        """
+        log_visits = math.log(node.visits)
+        mover = node.mover
+        return max(node.children,
+                   key=lambda item: item[1].rewards[mover] / item[1].visits +
+                   self.exploration * math.sqrt(log_visits / item[1].visits))
+
+    def _playout(self, board: Block, root: _Node) -> None:
+        """Play one playout from <root>, which is the position of <board>,
+        and record its rewards in the tree.
+        """
+        num_players = len(self.goals)
+        journal = MoveJournal(self._rng)
+        penalties = [0] * num_players
+        path = [root]
+        node = root
+
+        while not node.untried and node.children:
+            move, child = self._select(node)
+            if not self._apply(journal, board, move, node.mover, penalties):
+                break
+            node = child
+            path.append(node)
+        else:
+            # Moves are only listed once a position is expanded, since most
+            # positions are only ever reached by one playout.
+            if node.untried is None:
+                node.untried = self._tree_moves(board, node.mover)
+            if node.untried:
+                untried = node.untried
+                i = self._rng.randrange(len(untried))
+                untried[i], untried[-1] = untried[-1], untried[i]
+                move = untried.pop()
+                if self._apply(journal, board, move, node.mover, penalties):
+                    child = _Node((node.mover + 1) % num_players, hash(board),
+                                  num_players)
+                    node.children.append((move, child))
+                    node = child
+                    path.append(node)
+
+        mover = node.mover
+        for _ in range(self.rollout_plies):
+            possible = list(legal_moves(board, self.goals[mover].colour))
+            if possible:
+                move = self._rng.choice(possible)
+                if journal.apply(move, self.goals[mover].colour):
+                    penalties[mover] += ACTION_PENALTY[move[:2]]
+            mover = (mover + 1) % num_players
+
+        rewards = self._rewards(board, penalties)
+        while journal.undo():
+            pass
+        for visited in path:
+            visited.visits += 1
+            for i in range(num_players):
+                visited.rewards[i] += rewards[i]
+
+    def _rewards(self, board: Block, penalties: List[int]) -> List[float]:
+        """Return each player's reward for a playout that ended on <board>
+        with <penalties>.
+        """
+        net = [goal.incremental_score(board) - penalties[i]
+               for i, goal in enumerate(self.goals)]
+        best = max(net)
+        share = 1 / net.count(best)
+        return [share if score == best else 0.0 for score in net]
+
+    def _keep(self, chosen: _Node) -> None:
+        """Keep the positions one round of turns below <chosen>, which follows
+        the move made from the root, for the next search.
+        """
+        nodes = [chosen]
+        for _ in range(len(self.goals) - 1):
+            nodes = [child for node in nodes for _, child in node.children]
+        for node in nodes:
+            self._next_roots.setdefault(node.key, node)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'time', 'actions', 'block', 'goal', 'moves'
+        ],
+        'max-attributes': 15
+    })
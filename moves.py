@@ -0,0 +1,239 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains helpers for working with the moves that can be made on a
+board: functions that list every legal move, and the MoveJournal class, which
+makes moves in a way that can be undone and redone.
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+import random
+
+from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+from block import Block
+
+
+# The type of an entry in a MoveJournal
+_Entry = Tuple[Tuple[str, Optional[int]], Block,
+               Optional[Tuple[Optional[Tuple[int, int, int]], List[Block]]],
+               Optional[Tuple[Optional[Tuple[int, int, int]], List[Block]]]]
+
+
+# The actions that can be made on blocks with children, and on those that can
+# also be combined
+_PARENT_ACTIONS = (ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, SWAP_HORIZONTAL,
+                   SWAP_VERTICAL)
+_COMBINABLE_ACTIONS = _PARENT_ACTIONS + (COMBINE,)
+
+
+def _legal_actions(block: Block, colour: Tuple[int, int, int]) \
+        -> Tuple[Tuple[str, Optional[int]], ...]:
+    """Return the actions other than PASS that would succeed on <block>, for a
+    player who paints with <colour>.
+    """
+    if block.children:
+        if block.combinable():
+            return _COMBINABLE_ACTIONS
+        return _PARENT_ACTIONS
+    elif block.level != block.max_depth:
+        return (SMASH,)
+    elif block.colour != colour:
+        return (PAINT,)
+    return ()
+
+
+def legal_moves(board: Block, colour: Tuple[int, int, int]) \
+        -> Iterator[Tuple[str, Optional[int], Block]]:
+    """Yield every move other than PASS that would succeed on <board>, for a
+    player who paints with <colour>.
+
+    Blocks are visited in preorder. Blocks with children can be rotated and
+    swapped, smashable blocks can be smashed, combinable blocks can be
+    combined, and leaves at max_depth that are not already <colour> can be
+    painted.
+    """
+    stack = [board]
+    while stack:
+        block = stack.pop()
+        for action in _legal_actions(block, colour):
+            yield action + (block,)
+        stack.extend(reversed(block.children))
+
+
+def legal_paths(board: Block, colour: Tuple[int, int, int]) \
+        -> Iterator[Tuple[str, Optional[int], Tuple[int, ...]]]:
+    """Yield the same moves as legal_moves, in the same order, but with the
+    path to each block from <board> in place of the block itself.
+
+    A path is the child indexes followed from <board> to reach the block, and
+    stays meaningful on any board with the same structure.
+    """
+    stack = [(board, ())]
+    while stack:
+        block, path = stack.pop()
+        for action in _legal_actions(block, colour):
+            yield action + (path,)
+        children = block.children
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], path + (i,)))
+
+
+def block_at(board: Block, path: Tuple[int, ...]) -> Optional[Block]:
+    """Return the block reached from <board> by following the child indexes in
+    <path>, or None if there is no such block.
+    """
+    block = board
+    for index in path:
+        children = block.children
+        if index >= len(children):
+            return None
+        block = children[index]
+    return block
+
+
+class MoveJournal:
+    """A record of the moves made on a board, which can be undone and redone.
+
+    Undoing a move only touches the blocks that the move changed. Rotations and
+    swaps are undone by their inverse, and smashes, paints and combines are
+    undone by restoring the colour and children that the block had before.
+
+    Moves must be undone in the reverse order that they were made, and the
+    board must not be changed in any other way in between.
+    """
+    # === Private Attributes ===
+    # _done:
+    #   The moves that have been made, most recent last. Each entry is the
+    #   action, the block acted on, and the (colour, children) of that block
+    #   before and after the move, or None for rotations and swaps.
+    # _undone:
+    #   The moves that have been undone and can be redone, most recently
+    #   undone last.
+    # _rng:
+    #   The random number generator that smashes draw from, or None to use
+    #   the random module.
+    _done: List[_Entry]
+    _undone: List[_Entry]
+    _rng: Optional[random.Random]
+
+    def __init__(self, rng: Optional[random.Random] = None) -> None:
+        """Initialize an empty MoveJournal whose smashes draw random numbers
+        from <rng>, or from the random module if <rng> is None.
+        """
+        self._done = []
+        self._undone = []
+        self._rng = rng
+
+    def __len__(self) -> int:
+        """Return the number of moves that can be undone.
+        """
+        return len(self._done)
+
+    def apply(self, move: Tuple[str, Optional[int], Block],
+              colour: Optional[Tuple[int, int, int]] = None) -> bool:
+        """Attempt to do <move>, and record it if it was successful.
+
+        <colour> is the colour to paint with, if <move> is a paint. Making a
+        move forgets the moves that could have been redone.
+
+        Return True iff the move was successful.
+        """
+        action = (move[0], move[1])
+        block = move[2]
+        block.settle()
+        before = (block.colour, list(block.children))
+
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            move_successful = block.rotate(move[1])
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            move_successful = block.swap(move[1])
+        elif action == SMASH:
+            move_successful = block.smash(self._rng)
+        elif action == PAINT:
+            move_successful = block.paint(colour)
+        elif action == COMBINE:
+            move_successful = block.combine()
+        else:
+            move_successful = action == PASS
+
+        if move_successful:
+            if action in [SMASH, PAINT, COMBINE]:
+                after = (block.colour, list(block.children))
+                self._done.append((action, block, before, after))
+            else:
+                self._done.append((action, block, None, None))
+            self._undone = []
+        return move_successful
+
+    def undo(self) -> bool:
+        """Undo the most recent move that has not already been undone.
+
+        Return True iff there was a move to undo.
+        """
+        if not self._done:
+            return False
+
+        entry = self._done.pop()
+        action, block, before, _ = entry
+        if action == ROTATE_CLOCKWISE:
+            block.rotate(ROTATE_COUNTER_CLOCKWISE[1])
+        elif action == ROTATE_COUNTER_CLOCKWISE:
+            block.rotate(ROTATE_CLOCKWISE[1])
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            block.swap(action[1])
+        elif before is not None:
+            block.colour, block.children = before[0], list(before[1])
+        self._undone.append(entry)
+        return True
+
+    def redo(self) -> bool:
+        """Redo the most recently undone move.
+
+        A redone smash brings back the same children it made the first time.
+
+        Return True iff there was a move to redo.
+        """
+        if not self._undone:
+            return False
+
+        entry = self._undone.pop()
+        action, block, _, after = entry
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            block.rotate(action[1])
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            block.swap(action[1])
+        elif after is not None:
+            block.colour, block.children = after[0], list(after[1])
+        self._done.append(entry)
+        return True
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__',
+            'actions', 'block'
+        ],
+        'max-attributes': 15
+    })
@@ -0,0 +1,289 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the PersistentBlock class, an immutable board on which every
+move returns a new board that shares its unchanged subtrees with the old one.
+
+The game itself does not use PersistentBlock. Searches make their moves on the
+live board and undo them with moves.MoveJournal, which costs less than copying
+even a path per move. PersistentBlock is for keeping many snapshots of a
+board, such as in tests and analysis.
+"""
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import math
+import random
+
+from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+from block import Block
+from settings import COLOUR_LIST
+
+
+class PersistentBlock:
+    """An immutable square Block in the Blocky game, represented as a tree.
+
+    A PersistentBlock has no position or size of its own. Blocks within a
+    board are found by their path, the list of child indexes followed from the
+    root to reach them, and are placed on the screen when the board is turned
+    back into Blocks.
+
+    Moves never change a PersistentBlock. Instead, they return a new root in
+    which only the moved block and its ancestors are new, and every other
+    subtree is shared with the old root. Keeping an old root is therefore a
+    snapshot of the board that costs nothing, and each move costs O(depth),
+    except rotate, which has to rebuild the rotated subtree.
+
+    === Public Attributes ===
+    colour:
+        If this block is not subdivided, <colour> stores its colour. Otherwise,
+        <colour> is None.
+    level:
+        The level of this block within the overall block structure.
+    max_depth:
+        The deepest level allowed in the overall block structure.
+    children:
+        The blocks into which this block is subdivided, in the same order as
+        the children of a Block.
+
+    === Representation Invariants ===
+    - len(children) == 0 or len(children) == 4
+    - The attributes of a PersistentBlock are never changed after it is
+      initialized.
+    - If this Block has children, their max_depth is the same as that of this
+      Block, their level is one greater, and this Block's colour is None.
+    - If this Block has no children, its colour is not None.
+    - level <= max_depth
+    """
+    __slots__ = ('colour', 'level', 'max_depth', 'children')
+    colour: Optional[Tuple[int, int, int]]
+    level: int
+    max_depth: int
+    children: Tuple[PersistentBlock, ...]
+
+    def __init__(self, colour: Optional[Tuple[int, int, int]], level: int,
+                 max_depth: int,
+                 children: Tuple[PersistentBlock, ...] = ()) -> None:
+        """Initialize this block with the given <colour>, at <level>, and with
+        <children>.
+        """
+        self.colour = colour
+        self.level = level
+        self.max_depth = max_depth
+        self.children = children
+
+    @staticmethod
+    def from_block(block: Block) -> PersistentBlock:
+        """Return a PersistentBlock with the same structure and colours as the
+        tree rooted at <block>.
+        """
+        if not block.children:
+            return PersistentBlock(block.colour, block.level, block.max_depth)
+        return PersistentBlock(None, block.level, block.max_depth,
+                               tuple(PersistentBlock.from_block(child)
+                                     for child in block.children))
+
+    def to_block(self, position: Tuple[int, int], size: int) -> Block:
+        """Return a new tree of Blocks equivalent to this board, with its upper
+        left corner at <position> and dimensions of <size> by <size>.
+
+        Children are laid out in the same way as by Block.smash.
+        """
+        block = Block(position, size, self.colour, self.level, self.max_depth)
+        if self.children:
+            half = size // 2
+            x, y = position
+            positions = [(x + half, y), (x, y), (x, y + half),
+                         (x + half, y + half)]
+            block.children = [child.to_block(positions[i], half)
+                              for i, child in enumerate(self.children)]
+        return block
+
+    def __eq__(self, other: PersistentBlock) -> bool:
+        """Return True iff this block and <other> have the same structure,
+        colours and levels.
+
+        Subtrees shared by both boards are not compared.
+        """
+        if self is other:
+            return True
+        return self.colour == other.colour and self.level == other.level \
+            and self.max_depth == other.max_depth \
+            and self.children == other.children
+
+    def block_at(self, path: List[int]) -> PersistentBlock:
+        """Return the block reached from this one by following the child
+        indexes in <path>.
+        """
+        block = self
+        for index in path:
+            block = block.children[index]
+        return block
+
+    def _replace(self, path: List[int], block: PersistentBlock) \
+            -> PersistentBlock:
+        """Return a copy of this board in which the block at <path> has been
+        replaced by <block>. Only the ancestors of that block are copied.
+        """
+        if not path:
+            return block
+        index = path[0]
+        children = list(self.children)
+        children[index] = children[index]._replace(path[1:], block)
+        return PersistentBlock(None, self.level, self.max_depth,
+                               tuple(children))
+
+    def swap(self, path: List[int], direction: int) \
+            -> Optional[PersistentBlock]:
+        """Return a new board in which the children of the block at <path>
+        have been swapped, like Block.swap, or None if it has no children.
+        """
+        block = self.block_at(path)
+        if not block.children:
+            return None
+        c = block.children
+        if direction == 0:
+            children = (c[1], c[0], c[3], c[2])
+        else:
+            children = (c[3], c[2], c[1], c[0])
+        return self._replace(path, PersistentBlock(
+            None, block.level, block.max_depth, children))
+
+    def _rotated(self, direction: int) -> PersistentBlock:
+        """Return a copy of this block with it and all its descendants rotated
+        in <direction>.
+        """
+        if not self.children:
+            return self
+        c = [child._rotated(direction) for child in self.children]
+        if direction == 1:
+            children = (c[1], c[2], c[3], c[0])
+        else:
+            children = (c[3], c[0], c[1], c[2])
+        return PersistentBlock(None, self.level, self.max_depth, children)
+
+    def rotate(self, path: List[int], direction: int) \
+            -> Optional[PersistentBlock]:
+        """Return a new board in which the block at <path> and all its
+        descendants have been rotated, like Block.rotate, or None if it has no
+        children.
+
+        Leaves below the rotated block are shared with this board.
+        """
+        block = self.block_at(path)
+        if not block.children:
+            return None
+        return self._replace(path, block._rotated(direction))
+
+    def smash(self, path: List[int], rng: Optional[random.Random] = None) \
+            -> Optional[PersistentBlock]:
+        """Return a new board in which the block at <path> has been
+        sub-divided into four randomly generated children, like Block.smash,
+        or None if it cannot be smashed.
+
+        <rng> is drawn from in the same order as by Block.smash. If <rng> is
+        None, the random module is used.
+        """
+        block = self.block_at(path)
+        if block.children or block.level == block.max_depth:
+            return None
+        return self._replace(path,
+                             block._smashed(random if rng is None else rng))
+
+    def _smashed(self, rng: random.Random) -> PersistentBlock:
+        """Return a randomly sub-divided block at this block's level, drawing
+        random numbers from <rng>.
+        """
+        num = rng.random()
+        children = []
+        for _ in range(4):
+            child = PersistentBlock(rng.choice(COLOUR_LIST),
+                                    self.level + 1, self.max_depth)
+            if num < math.exp(-0.25 * self.level) and \
+                    child.level != child.max_depth:
+                child = child._smashed(rng)
+            children.append(child)
+        return PersistentBlock(None, self.level, self.max_depth,
+                               tuple(children))
+
+    def paint(self, path: List[int], colour: Tuple[int, int, int]) \
+            -> Optional[PersistentBlock]:
+        """Return a new board in which the block at <path> has been painted
+        <colour>, like Block.paint, or None if its colour cannot be changed.
+        """
+        block = self.block_at(path)
+        if block.level != block.max_depth or block.colour == colour:
+            return None
+        return self._replace(path, PersistentBlock(colour, block.level,
+                                                   block.max_depth))
+
+    def combine(self, path: List[int]) -> Optional[PersistentBlock]:
+        """Return a new board in which the block at <path> has been turned into
+        a leaf of the majority colour of its children, like Block.combine, or
+        None if it cannot be combined.
+        """
+        block = self.block_at(path)
+        if block.level != block.max_depth - 1 or not block.children:
+            return None
+        colours = [child.colour for child in block.children]
+        counts = [colours.count(colour) for colour in colours]
+        maximum = max(counts)
+        if maximum < 2 or min(counts) == maximum:
+            return None
+        return self._replace(path, PersistentBlock(
+            colours[counts.index(maximum)], block.level, block.max_depth))
+
+    def apply(self, action: Tuple[str, Optional[int]], path: List[int],
+              colour: Optional[Tuple[int, int, int]] = None,
+              rng: Optional[random.Random] = None) \
+            -> Optional[PersistentBlock]:
+        """Return the board that results from doing <action> to the block at
+        <path>, or None if the move is unsuccessful.
+
+        <colour> is the colour to paint with, if <action> is PAINT. A smash
+        draws random numbers from <rng>, or from the random module if <rng> is
+        None. Passing returns this board.
+        """
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            return self.rotate(path, action[1])
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            return self.swap(path, action[1])
+        elif action == SMASH:
+            return self.smash(path, rng)
+        elif action == PAINT:
+            return self.paint(path, colour)
+        elif action == COMBINE:
+            return self.combine(path)
+        elif action == PASS:
+            return self
+        return None
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'actions', 'block', 'settings'
+        ],
+        'max-attributes': 15
+    })
@@ -22,19 +22,27 @@ Misha Schwartz, and Jaisie Sin.
 This file contains the hierarchy of player classes.
 """
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import atexit
+import multiprocessing.pool
 import random
 import pygame
 
 from block import Block
-from goal import Goal, generate_goals
+from goal import Goal, TranspositionTable, generate_goals
+from mcts import MCTSEngine
+from moves import MoveJournal, block_at, legal_moves, legal_paths
+from search import SearchEngine
+from serialize import decode, encode
+from workers import spawn_pool
 
-from actions import KEY_ACTION, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
-    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+from actions import KEY_ACTION, PASS, SMASH
 
 
-def create_players(num_human: int, num_random: int, smart_players: List[int]) \
-        -> List[Player]:
+def create_players(num_human: int, num_random: int, smart_players: List[int],
+                   search_players: Optional[List[float]] = None,
+                   mcts_players: Optional[List[int]] = None,
+                   rng: Optional[random.Random] = None) -> List[Player]:
     """Return a new list of Player objects.
 
     <num_human> is the number of human player, <num_random> is the number of
@@ -45,17 +53,35 @@ def create_players(num_human: int, num_random: int, smart_players: List[int]) \
     <num_random> RandomPlayer objects, then the same number of SmartPlayer
     objects as the length of <smart_players>. The difficulty levels in
     <smart_players> should be applied to each SmartPlayer object, in order.
+
+    <search_players> is a list of the seconds each SearchPlayer may take per
+    move, and <mcts_players> is a list of the playouts each MCTSPlayer makes
+    per move. These players are added last, in that order.
+
+    The goals, and every player that makes random choices, draw random
+    numbers from <rng>, or from the random module if <rng> is None.
     """
-    goal = generate_goals(num_random + num_human + len(smart_players))
+    search_players = search_players or []
+    mcts_players = mcts_players or []
+    goal = generate_goals(num_random + num_human + len(smart_players) +
+                          len(search_players) + len(mcts_players), rng)
     final = []
     for x in range(num_human):
         final.append(HumanPlayer(x, goal[x]))
     for y in range(num_random):
-        final.append(RandomPlayer(num_human + y, goal[num_human + y]))
+        final.append(RandomPlayer(num_human + y, goal[num_human + y], rng))
     for z in range(len(smart_players)):
         final.append(SmartPlayer(num_human + num_random + z,
                                  goal[num_human + num_random + z],
-                                 smart_players[z]))
+                                 smart_players[z], rng=rng))
+    first = num_human + num_random + len(smart_players)
+    for w in range(len(search_players)):
+        final.append(SearchPlayer(first + w, goal[first + w], goal,
+                                  search_players[w]))
+    first += len(search_players)
+    for v in range(len(mcts_players)):
+        final.append(MCTSPlayer(first + v, goal[first + v], goal,
+                                mcts_players[v], rng=rng))
     return final
 
 
@@ -74,26 +100,28 @@ def _get_block(block: Block, location: Tuple[int, int], level: int) -> \
 
     If no Block can be found at <location>, return None.
 
+    Only one block per level is visited: the child that may include
+    <location> is chosen by comparing it with the edges of the children.
+
     Preconditions:
         - 0 <= level <= max_depth
     """
-    x = None
-    if block.position[0] <= location[0] < block.position[0] + block.size \
-            and block.position[1] <= location[1] < block.position[1] + \
-            block.size and block.level == level:
-        return block
-    elif block.position[0] <= location[0] < block.position[0] + block.size \
-            and block.position[1] <= location[1] < block.position[1] + \
-            block.size and block.colour is not None:
-        return block
-    elif block.position[0] <= location[0] < block.position[0] + block.size \
-            and block.position[1] <= location[1] < block.position[1] + \
-            block.size:
-        for child in block.children:
-            x = _get_block(child, location, level)
-            if x:
-                break
-    return x
+    x, y = location
+    while True:
+        left, top = block.position
+        if not (left <= x < left + block.size and top <= y < top + block.size):
+            return None
+        if block.level == level or block.colour is not None:
+            return block
+        children = block.children
+        if not children:
+            return None
+        if x >= children[0].position[0]:
+            block = children[3] if y >= children[3].position[1] else \
+                children[0]
+        else:
+            block = children[2] if y >= children[2].position[1] else \
+                children[1]
 
 
 class Player:
@@ -147,6 +175,60 @@ def _create_move(action: Tuple[str, Optional[int]], block: Block) -> \
     return action[0], action[1], block
 
 
+# A SmartPlayer only hands its candidates to a process pool when it has at
+# least this many to score, since each round trip to the pool has a cost.
+PARALLEL_MIN_CANDIDATES = 32
+
+# The process pools used by SmartPlayers, keyed by their number of processes.
+_POOLS: Dict[int, multiprocessing.pool.Pool] = {}
+
+
+def _get_pool(processes: int) -> multiprocessing.pool.Pool:
+    """Return a pool of <processes> worker processes, starting it the first
+    time it is needed.
+    """
+    if processes not in _POOLS:
+        _POOLS[processes] = spawn_pool(processes)
+    return _POOLS[processes]
+
+
+def close_pools() -> None:
+    """Close the process pools used by SmartPlayers and wait for their workers
+    to exit.
+
+    This is called when the program exits. A SmartPlayer that needs a pool
+    after this starts a new one.
+    """
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.close()
+        pool.join()
+
+
+atexit.register(close_pools)
+
+
+def _score_candidates(task: Tuple[bytes, Goal,
+                                  List[Tuple[str, Optional[int],
+                                             Tuple[int, ...]]]]) -> List[int]:
+    """Return the score of a goal after each of a list of moves, each made on
+    its own on the same board.
+
+    <task> is the board as returned by serialize.encode, the goal, and the
+    moves, with the path to each block in place of the block. None of the
+    moves may be a smash.
+    """
+    data, goal, moves = task
+    board = decode(data)
+    journal = MoveJournal()
+    scores = []
+    for action, direction, path in moves:
+        journal.apply((action, direction, block_at(board, path)), goal.colour)
+        scores.append(goal.incremental_score(board))
+        journal.undo()
+    return scores
+
+
 class HumanPlayer(Player):
     """A human player.
     """
@@ -155,11 +237,17 @@ class HumanPlayer(Player):
     #     The level of the Block that the user selected most recently.
     # _desired_action:
     #     The most recent action that the user is attempting to do.
+    # _selection:
+    #     The mouse position, level, board id and board version that the
+    #     selected block was last found for, and that block, or None if no
+    #     block has been looked for yet.
     #
     # == Representation Invariants concerning the private attributes ==
     #     _level >= 0
     _level: int
     _desired_action: Optional[Tuple[str, Optional[int]]]
+    _selection: Optional[Tuple[Tuple[Tuple[int, int], int, int, int],
+                               Optional[Block]]]
 
     def __init__(self, player_id: int, goal: Goal) -> None:
         """Initialize this HumanPlayer with the given <renderer>, <player_id>
@@ -171,17 +259,21 @@ class HumanPlayer(Player):
         # and _selected_block to None.
         self._level = 0
         self._desired_action = None
+        self._selection = None
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         """Return the block that is currently selected by the player based on
         the position of the mouse on the screen and the player's desired level.
 
         If no block is selected by the player, return None.
-        """
-        mouse_pos = pygame.mouse.get_pos()
-        block = _get_block(board, mouse_pos, self._level)
 
-        return block
+        The block is only looked for again once the mouse, the player's level
+        or <board> has changed, so this is cheap to call on every frame.
+        """
+        key = (pygame.mouse.get_pos(), self._level, id(board), board.version)
+        if self._selection is None or self._selection[0] != key:
+            self._selection = (key, _get_block(board, key[0], self._level))
+        return self._selection[1]
 
     def process_event(self, event: pygame.event.Event) -> None:
         """Respond to the relevant keyboard events made by the player based on
@@ -221,12 +313,17 @@ class RandomPlayer(Player):
     # _proceed:
     #   True when the player should make a move, False when the player should
     #   wait.
+    # _rng:
+    #   The random number generator that this player's moves are drawn from.
     """A random player"""
     _proceed: bool
+    _rng: random.Random
 
-    def __init__(self, player_id: int, goal: Goal) -> None:
+    def __init__(self, player_id: int, goal: Goal,
+                 rng: Optional[random.Random] = None) -> None:
         Player.__init__(self, player_id, goal)
         self._proceed = False
+        self._rng = random if rng is None else rng
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         return None
@@ -240,62 +337,19 @@ class RandomPlayer(Player):
         """Return a valid, randomly generated move.
 
         A valid move is a move other than PASS that can be successfully
-        performed on the <board>.
+        performed on the <board>. Every valid move is equally likely. If there
+        are no valid moves, this player will pass.
 
         This function does not mutate <board>.
         """
         if not self._proceed:
             return None  # Do not remove
 
-        possible = [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
-                    SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, SMASH, PAINT]
-        x = None
-        m = True
-        while m:
-            copy = board.create_copy()
-            y = _pick_random_block(board, copy)
-            actual = y[0]
-            rand = y[1]
-            move = random.choice(possible)
-            if move == ROTATE_CLOCKWISE and rand.rotate(1):
-                m = False
-                x = _create_move(ROTATE_CLOCKWISE, actual)
-            elif move == ROTATE_COUNTER_CLOCKWISE and rand.rotate(3):
-                m = False
-                x = _create_move(ROTATE_COUNTER_CLOCKWISE, actual)
-            elif move == SWAP_HORIZONTAL and rand.swap(0):
-                m = False
-                x = _create_move(SWAP_HORIZONTAL, actual)
-            elif move == SWAP_VERTICAL and rand.swap(1):
-                m = False
-                x = _create_move(SWAP_VERTICAL, actual)
-            elif move == COMBINE and rand.combine():
-                m = False
-                x = _create_move(COMBINE, actual)
-            elif move == SMASH and rand.smash():
-                m = False
-                x = _create_move(SMASH, actual)
-            elif move == PAINT and rand.paint(self.goal.colour):
-                m = False
-                x = _create_move(PAINT, actual)
+        possible = list(legal_moves(board, self.goal.colour))
         self._proceed = False
-        return x
-
-
-def _pick_random_block(block: Block, copy: Block) -> Tuple[Block, Block]:
-    """Return a random block in <block> at a random depth"""
-
-    if not block.children:
-        return block, copy
-    child = random.randint(0, 3)
-    further = random.choice([True, False])
-    x = block.children[child]
-    y = copy.children[child]
-    while further:
-        child = random.randint(0, 3)
-        x, y = _pick_random_block(block.children[child], copy.children[child])
-        further = False
-    return x, y
+        if not possible:
+            return _create_move(PASS, board)
+        return self._rng.choice(possible)
 
 
 class SmartPlayer(Player):
@@ -303,14 +357,33 @@ class SmartPlayer(Player):
     # _proceed:
     #   True when the player should make a move, False when the player should
     #   wait.
-    """A smart player."""
+    # _table:
+    #   The scores of this player's goal on boards it has already assessed.
+    # _rng:
+    #   The random number generator that candidate moves, and the outcomes of
+    #   smashes among them, are drawn from.
+    """A smart player.
+
+    === Public Attributes ===
+    processes:
+        The number of worker processes that score candidate moves, or 1 to
+        score them in this process.
+    """
     _proceed: bool
+    _table: TranspositionTable
+    _rng: random.Random
     difficulty: int
+    processes: int
 
-    def __init__(self, player_id: int, goal: Goal, difficulty: int) -> None:
+    def __init__(self, player_id: int, goal: Goal, difficulty: int,
+                 processes: int = 1,
+                 rng: Optional[random.Random] = None) -> None:
         Player.__init__(self, player_id, goal)
         self.difficulty = difficulty
+        self.processes = processes
         self._proceed = False
+        self._table = TranspositionTable()
+        self._rng = random if rng is None else rng
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         return None
@@ -326,65 +399,196 @@ class SmartPlayer(Player):
         disregarding penalties).
 
         A valid move is a move other than PASS that can be successfully
-        performed on the <board>. If no move can be found that is better than
-        the current score, this player will pass.
-
-        This function does not mutate <board>.
+        performed on the <board>. Up to <difficulty> different valid moves are
+        assessed. If no move can be found that is better than the current
+        score, this player will pass.
+
+        Candidate moves are tried on <board> itself and then undone, so
+        <board> is left as it was. If this player has more than one process,
+        the candidates are scored in a pool instead, and the same move is
+        chosen as if they had been scored here.
         """
         if not self._proceed:
             return None  # Do not remove
 
-        possible = [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, SWAP_HORIZONTAL,
-                    SWAP_VERTICAL, COMBINE, SMASH, PAINT]
-        present_score = self.goal.score(board)
-        score = []
-        done = []
-
-        while len(done) < self.difficulty:
-            copy = board.create_copy()
-            y = _pick_random_block(board, copy)
-            actual = y[0]
-            fake = y[1]
-            move = random.choice(possible)
-
-            while (actual, move) in done:
-                copy = board.create_copy()
-                y = _pick_random_block(board, copy)
-                actual = y[0]
-                fake = y[1]
-                move = random.choice(possible)
-
-            if move == ROTATE_CLOCKWISE and fake.rotate(1):
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == ROTATE_COUNTER_CLOCKWISE and fake.rotate(3):
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == SWAP_HORIZONTAL and fake.swap(0):
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == SWAP_VERTICAL and fake.swap(1):
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == COMBINE and fake.combine():
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == SMASH and fake.smash():
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-            elif move == PAINT and fake.paint(self.goal.colour):
-                score.append(self.goal.score(copy))
-                done.append((actual, move))
-
-        maximum = max(score)
-        if maximum <= present_score:
-            self._proceed = False
+        possible = list(legal_moves(board, self.goal.colour))
+        # Sampling indexes draws the same random numbers as sampling moves.
+        indexes = self._rng.sample(range(len(possible)),
+                                   min(self.difficulty, len(possible)))
+        candidates = [possible[i] for i in indexes]
+        present_score = self._table.score(self.goal, board)
+
+        if self.processes > 1 and len(candidates) >= PARALLEL_MIN_CANDIDATES:
+            score = self._score_in_pool(board, indexes, candidates)
+        else:
+            score = self._score_here(board, candidates)
+
+        self._proceed = False
+        if not score or max(score) <= present_score:
             return _create_move(PASS, board)
         else:
-            index = score.index(maximum)
-            action = done[index][1]
-            self._proceed = False
-            return _create_move(action, done[index][0])
+            return candidates[score.index(max(score))]
+
+    def _score_here(self, board: Block,
+                    candidates: List[Tuple[str, Optional[int], Block]]) \
+            -> List[int]:
+        """Return the score of this player's goal after each of <candidates>,
+        by making each one on <board> and undoing it.
+        """
+        journal = MoveJournal(self._rng)
+        score = []
+        for move in candidates:
+            journal.apply(move, self.goal.colour)
+            score.append(self._table.score(self.goal, board))
+            journal.undo()
+        return score
+
+    def _score_in_pool(self, board: Block, indexes: List[int],
+                       candidates: List[Tuple[str, Optional[int], Block]]) \
+            -> List[int]:
+        """Return the score of this player's goal after each of <candidates>,
+        which are the legal moves on <board> at <indexes>, using the pool.
+
+        Smashes are scored here, in order, so that they draw the same random
+        numbers as they would if every candidate were scored here. The rest
+        are split into one contiguous chunk per process, and the results are
+        put back in the order of <candidates>.
+        """
+        paths = list(legal_paths(board, self.goal.colour))
+        data = encode(board)
+        remote = [i for i, move in enumerate(candidates)
+                  if move[0] != SMASH[0]]
+        size = -(-len(remote) // self.processes)
+        chunks = [remote[i:i + size] for i in range(0, len(remote), size)]
+        tasks = [(data, self.goal, [paths[indexes[i]] for i in chunk])
+                 for chunk in chunks]
+        pending = _get_pool(self.processes).map_async(_score_candidates,
+                                                      tasks)
+
+        score = [0] * len(candidates)
+        local = [i for i, move in enumerate(candidates)
+                 if move[0] == SMASH[0]]
+        for i, value in zip(local,
+                            self._score_here(board,
+                                             [candidates[i] for i in local])):
+            score[i] = value
+        for chunk, values in zip(chunks, pending.get()):
+            for i, value in zip(chunk, values):
+                score[i] = value
+        return score
+
+
+class SearchPlayer(Player):
+    # === Private Attributes ===
+    # _proceed:
+    #   True when the player should make a move, False when the player should
+    #   wait.
+    # _engine:
+    #   The search engine that chooses this player's moves.
+    """A player that searches several moves ahead, assuming that every other
+    player plays against it.
+
+    === Public Attributes ===
+    plies:
+        The number of plies the last search completed.
+    """
+    _proceed: bool
+    _engine: SearchEngine
+    plies: int
+
+    def __init__(self, player_id: int, goal: Goal, goals: List[Goal],
+                 time_limit: float) -> None:
+        """Initialize this player, in a game between players whose goals are
+        <goals>, indexed by player ID, to take up to <time_limit> seconds per
+        move.
+
+        Precondition: goals[player_id] is goal
+        """
+        Player.__init__(self, player_id, goal)
+        self._proceed = False
+        self._engine = SearchEngine(goals, time_limit)
+        self.plies = 0
+
+    def get_selected_block(self, board: Block) -> Optional[Block]:
+        return None
+
+    def process_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._proceed = True
+
+    def generate_move(self, board: Block) -> \
+            Optional[Tuple[str, Optional[int], Block]]:
+        """Return the move with the best outcome for this player found by a
+        search of at most its time limit, or PASS if no move is better than
+        passing.
+
+        Moves are tried on <board> itself and then undone, so <board> is left
+        as it was.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+
+        move, self.plies = self._engine.search(board, self.id)
+        self._proceed = False
+        return move
+
+
+class MCTSPlayer(Player):
+    # === Private Attributes ===
+    # _proceed:
+    #   True when the player should make a move, False when the player should
+    #   wait.
+    # _engine:
+    #   The Monte Carlo tree search that chooses this player's moves, and
+    #   keeps its tree between turns.
+    """A player that chooses its moves by Monte Carlo tree search.
+
+    === Public Attributes ===
+    playouts:
+        The number of playouts the last move was based on, including those
+        reused from earlier turns.
+    """
+    _proceed: bool
+    _engine: MCTSEngine
+    playouts: int
+
+    def __init__(self, player_id: int, goal: Goal, goals: List[Goal],
+                 playouts: int, time_limit: Optional[float] = None,
+                 rng: Optional[random.Random] = None) -> None:
+        """Initialize this player, in a game between players whose goals are
+        <goals>, indexed by player ID, to make up to <playouts> playouts per
+        move, taking up to <time_limit> seconds if it is not None.
+
+        Random numbers are drawn from <rng>, or from the random module if
+        <rng> is None.
+
+        Precondition: goals[player_id] is goal
+        """
+        Player.__init__(self, player_id, goal)
+        self._proceed = False
+        self._engine = MCTSEngine(goals, playouts, time_limit, rng=rng)
+        self.playouts = 0
+
+    def get_selected_block(self, board: Block) -> Optional[Block]:
+        return None
+
+    def process_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._proceed = True
+
+    def generate_move(self, board: Block) -> \
+            Optional[Tuple[str, Optional[int], Block]]:
+        """Return the move that the most playouts went through.
+
+        Playouts are made on <board> itself and then undone, so <board> is
+        left as it was.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+
+        move, self.playouts = self._engine.search(board, self.id)
+        self._proceed = False
+        return move
 
 
 if __name__ == '__main__':
@@ -394,7 +598,8 @@ if __name__ == '__main__':
         'allowed-io': ['process_event'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'actions', 'block',
-            'goal', 'pygame', '__future__'
+            'goal', 'moves', 'search', 'mcts', 'pygame', '__future__',
+            'atexit', 'multiprocessing', 'serialize', 'workers'
         ],
         'max-attributes': 10,
         'generated-members': 'pygame.*'
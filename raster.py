@@ -0,0 +1,155 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains functions that turn the squares of a board, as listed by
+blocky._block_to_squares, into an array of pixels with NumPy array operations,
+instead of drawing one rectangle per square.
+
+Each square is filled into an array of the index of the square that each
+pixel shows, with one array operation for all of the squares of the same
+size. The same operation marks the pixels within OUTLINE_THICKNESS of the
+edge of their square, which are given OUTLINE_COLOUR.
+
+Squares are placed at their blocks' own positions, so the pixels are the same
+as drawing the squares with Renderer.draw_board, whichever way the board's
+blocks were laid out.
+
+These functions need NumPy. AVAILABLE is False if it is not installed.
+"""
+from typing import List, Tuple
+from itertools import chain
+
+from settings import BACKGROUND_COLOUR, OUTLINE_COLOUR, OUTLINE_THICKNESS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# True iff boards can be rasterized, because NumPy is installed.
+AVAILABLE = np is not None
+
+# The owner of a pixel that is not covered by any square.
+_NO_SQUARE = -1
+
+
+def _table(squares: List[Tuple[Tuple[int, int, int], Tuple[int, int],
+                                int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return an array of the RGB colour of each of <squares>, and an array
+    of the x and y coordinates of its upper left corner and its size.
+    """
+    colours = np.fromiter(chain.from_iterable(colour for colour, _, _ in
+                                              squares),
+                          dtype=np.uint8, count=3 * len(squares))
+    geometry = np.fromiter(chain.from_iterable(pos + (side,)
+                                               for _, pos, side in squares),
+                           dtype=np.int32, count=3 * len(squares))
+    return colours.reshape(-1, 3), geometry.reshape(-1, 3)
+
+
+def _fill(geometry: np.ndarray, size: int) -> np.ndarray:
+    """Return an array with a value for each pixel of the board made of the
+    squares described by <geometry>, as returned by _table, indexed by x and
+    then y: twice the index of the square the pixel shows, plus 1 if the pixel
+    is within OUTLINE_THICKNESS of the edge of that square. Pixels that no
+    square covers have the value _NO_SQUARE.
+
+    Where squares overlap, the pixel shows the later one, which is drawn over
+    the earlier one by Renderer.draw_board. The array is at least <size> by
+    <size>, and is larger if any square reaches past that.
+    """
+    corners, sides = geometry[:, :2], geometry[:, 2]
+    extent = size
+    if len(sides) > 0:
+        extent = max(size, int((corners + sides[:, None]).max()))
+    values = np.full((extent, extent), _NO_SQUARE, dtype=np.int32)
+    for side in np.unique(sides):
+        # All of the squares of one size are filled at once.
+        which = np.flatnonzero(sides == side).astype(np.int32)
+        offsets = np.arange(side)
+        edge = np.minimum(offsets, side - 1 - offsets) < OUTLINE_THICKNESS
+        xs, ys, square = np.broadcast_arrays(
+            corners[which, 0][:, None, None] + offsets[None, :, None],
+            corners[which, 1][:, None, None] + offsets[None, None, :],
+            2 * which[:, None, None] + (edge[:, None] | edge[None, :]))
+        # Squares of the same size can overlap after blocks are moved to
+        # rounded positions, and the order of one assignment is undefined.
+        values[xs, ys] = np.maximum(values[xs, ys], square)
+        lost = values[xs, ys] < square
+        if lost.any():
+            np.maximum.at(values, (xs[lost], ys[lost]), square[lost])
+    return values
+
+
+def pixel_owners(squares: List[Tuple[Tuple[int, int, int], Tuple[int, int],
+                                     int]],
+                 size: int) -> np.ndarray:
+    """Return a <size> by <size> array of the index in <squares> of the
+    square that each pixel shows, indexed by x and then y, or _NO_SQUARE for
+    pixels that no square covers.
+
+    Where squares overlap, the pixel shows the later one.
+
+    Preconditions:
+        - NumPy is available.
+        - No square has a negative coordinate.
+
+    >>> squares = [((0, 0, 0), (1, 0), 2), ((0, 0, 0), (0, 2), 1)]
+    >>> pixel_owners(squares, 3).tolist()
+    [[-1, -1, 1], [0, 0, -1], [0, 0, -1]]
+    """
+    return _fill(_table(squares)[1], size)[:size, :size] >> 1
+
+
+def raster_squares(squares: List[Tuple[Tuple[int, int, int], Tuple[int, int],
+                                       int]],
+                   size: int) -> np.ndarray:
+    """Return a <size> by <size> by 3 array of the RGB colour of each pixel of
+    a board made of <squares>, indexed by x and then y, as pygame.surfarray
+    expects.
+
+    The pixels are the same as drawing <squares> in order with
+    Renderer.draw_board. Any part of a square past the edge of the board is
+    left out.
+
+    Preconditions:
+        - NumPy is available.
+        - No square has a negative coordinate.
+    """
+    colours, geometry = _table(squares)
+    values = _fill(geometry, size)[:size, :size]
+    # Outline pixels index the outline colour after the squares' colours, and
+    # the owner of uncovered pixels indexes the background colour at the end.
+    palette = np.concatenate([colours, [OUTLINE_COLOUR, BACKGROUND_COLOUR]]) \
+        .astype(np.uint8)
+    indexes = np.where((values & 1 == 1) & (values != _NO_SQUARE),
+                       len(colours), values >> 1)
+    return np.take(palette, indexes, axis=0)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'itertools', 'numpy', 'settings'
+        ]
+    })
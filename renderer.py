@@ -21,7 +21,7 @@ Misha Schwartz, and Jaisie Sin.
 
 This file contains the class that "renders" the image of our game.
 """
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 import pygame
 
 from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
@@ -33,6 +33,10 @@ from settings import BACKGROUND_COLOUR, TEXT_COLOUR, OUTLINE_THICKNESS, \
 
 Y_FONT_PADDING = 2
 
+# The most scaled copies of action images that a Renderer keeps, unless it has
+# been asked to cache more by Renderer.cache_images.
+IMAGE_CACHE_CAPACITY = 64
+
 
 def _load_image(path_to_file: str) -> pygame.Surface:
     """
@@ -152,12 +156,37 @@ class Renderer:
     #   A dictionary mapping actions to images that are displayed in the game.
     # _status_position:
     #   The (x, y) position of the status messages.
+    # _size:
+    #   The width and height of the board.
+    # _board:
+    #   The board as it was last drawn, kept off screen so that it can be
+    #   shown again without drawing any of its squares.
+    # _squares:
+    #   The list of squares last drawn on <_board>, in the order they were
+    #   drawn.
+    # _pixels:
+    #   The array of pixels copied to <_board> by draw_pixels, or None if the
+    #   board was last drawn from squares.
+    # _scaled:
+    #   Copies of <_images> scaled to the sizes they have been drawn at, keyed
+    #   by action and size, oldest first. Once <_capacity> copies are kept,
+    #   the oldest is dropped to make room for a new one.
+    # _capacity:
+    #   The most scaled copies kept in <_scaled>. This is
+    #   IMAGE_CACHE_CAPACITY, or enough for every copy made by cache_images
+    #   if that is more.
     _screen: pygame.Surface
     _instructions: pygame.Surface
     _images: Dict[Tuple[str, Optional[int]], pygame.Surface]
     _font: pygame.font.Font
     _status_position: Tuple[int, int]
     _clear_rect: Tuple[Tuple[int, int], Tuple[int, int]]
+    _size: int
+    _board: pygame.Surface
+    _squares: List[Tuple[Tuple[int, int, int], Tuple[int, int], int]]
+    _pixels: Optional[Any]
+    _scaled: Dict[Tuple[Tuple[str, Optional[int]], int], pygame.Surface]
+    _capacity: int
 
     def __init__(self, size: int) -> None:
         """Initialize this Renderer for a board with dimensions <size> x <size>.
@@ -176,6 +205,11 @@ class Renderer:
         self._status_position = (10, size + Y_FONT_PADDING)
         self._clear_rect = ((0, 0), (size, height))
 
+        self._board = pygame.Surface((size, size))
+        self._board.fill(BACKGROUND_COLOUR)
+        self._squares = []
+        self._pixels = None
+
         self._images = {
             ROTATE_CLOCKWISE: _load_image('images/rotate-cw.png'),
             ROTATE_COUNTER_CLOCKWISE: _load_image('images/rotate-ccw.png'),
@@ -186,6 +220,9 @@ class Renderer:
             PAINT: _load_image('images/paint.png'),
             PASS: _load_image('images/pass.png')
         }
+        self._scaled = {}
+        self._capacity = IMAGE_CACHE_CAPACITY
+        self._size = size
 
     def clear(self) -> None:
         """Clear the screen with BACKGROUND_COLOUR.
@@ -200,19 +237,99 @@ class Renderer:
         If the action is not supported, no image is drawn.
         """
         if action in self._images:
-            image = self._images[action]
-            image = pygame.transform.scale(image, (size, size))
-            self._screen.blit(image, pos)
+            self._screen.blit(self._scaled_image(action, size), pos)
+
+    def _scaled_image(self, action: Tuple[str, Optional[int]],
+                      size: int) -> pygame.Surface:
+        """Return the image for <action> scaled to <size> by <size>, in the
+        pixel format of the screen, scaling it only if it is not already
+        cached.
+        """
+        key = (action, size)
+        image = self._scaled.get(key)
+        if image is None:
+            if len(self._scaled) >= self._capacity:
+                del self._scaled[next(iter(self._scaled))]
+            # Converting to the screen's pixel format makes each blit several
+            # times cheaper.
+            image = pygame.transform.scale(self._images[action],
+                                           (size, size)).convert_alpha()
+            self._scaled[key] = image
+        return image
+
+    def cache_images(self, max_depth: int) -> None:
+        """Scale every action image ahead of time to each size that a block
+        can have on a board of <max_depth>, as made by generate_board.
+
+        The sizes halve at each level, rounding down, as in Block.smash. The
+        cache grows if needed to hold every one of these images at once.
+        """
+        self._capacity = max(self._capacity,
+                             len(self._images) * (max_depth + 1))
+        for level in range(max_depth + 1):
+            for action in self._images:
+                self._scaled_image(action, self._size >> level)
 
     def draw_board(self, squares: List[Tuple[Tuple[int, int, int],
                                              Tuple[int, int], int]]) -> None:
         """Draw each block in blocks onto the screen.
+
+        The board is kept off screen between calls. Only the area covered by
+        the squares that were added or removed since the last call is drawn
+        again, and then the whole board is copied to the screen at once. The
+        result is the same as drawing every square on a cleared screen.
+
+        Nothing is drawn again if <squares> is the same list that was drawn
+        last, so a list must not be changed once it has been drawn.
+        """
+        if self._pixels is not None:
+            self._draw_squares(self._board.get_rect(), squares)
+            self._squares = squares
+            self._pixels = None
+        elif squares is not self._squares:
+            changed = set(squares).symmetric_difference(self._squares)
+            if changed:
+                rects = [pygame.Rect(pos, (size, size))
+                         for _, pos, size in changed]
+                self._draw_squares(rects[0].unionall(rects[1:]), squares)
+            else:
+                # Only the order of the squares has changed, which matters
+                # wherever they overlap.
+                self._draw_squares(self._board.get_rect(), squares)
+            self._squares = squares
+        self._screen.blit(self._board, (0, 0))
+
+    def _draw_squares(self, area: pygame.Rect,
+                      squares: List[Tuple[Tuple[int, int, int],
+                                          Tuple[int, int], int]]) -> None:
+        """Clear <area> of the off-screen board and draw the parts of
+        <squares> that lie within it.
         """
+        self._board.set_clip(area)
+        self._board.fill(BACKGROUND_COLOUR)
+        left, top, right, bottom = area.left, area.top, area.right, area.bottom
         for colour, pos, size in squares:
-            rect = (pos[0], pos[1], size, size)
-            pygame.draw.rect(self._screen, colour, rect, 0)
-            pygame.draw.rect(self._screen, OUTLINE_COLOUR, rect,
-                             OUTLINE_THICKNESS)
+            if pos[0] < right and left < pos[0] + size and \
+                    pos[1] < bottom and top < pos[1] + size:
+                rect = (pos[0], pos[1], size, size)
+                pygame.draw.rect(self._board, colour, rect, 0)
+                pygame.draw.rect(self._board, OUTLINE_COLOUR, rect,
+                                 OUTLINE_THICKNESS)
+        self._board.set_clip(None)
+
+    def draw_pixels(self, pixels: Any) -> None:
+        """Draw the board from <pixels>, a NumPy array of the RGB colour of
+        each of its pixels indexed by x and then y, as made by
+        raster.raster_squares.
+
+        The array is copied to the off-screen board in one operation, and only
+        if it is not the array that was copied last.
+        """
+        if pixels is not self._pixels:
+            pygame.surfarray.blit_array(self._board, pixels)
+            self._pixels = pixels
+            self._squares = []
+        self._screen.blit(self._board, (0, 0))
 
     def highlight_block(self, pos: Tuple[int, int], size: int) -> None:
         """Draw a highlighted square border at pos with size.
@@ -237,6 +354,12 @@ class Renderer:
         surface = self._font.render(message, 1, TEXT_COLOUR)
         self._screen.blit(surface, self._status_position)
 
+    def screen(self) -> pygame.Surface:
+        """Return the surface that everything is drawn on, which is the same
+        surface for the lifetime of this Renderer.
+        """
+        return self._screen
+
     def save_to_file(self, filename: str) -> None:
         """Save the current graphics on the screen to a file named <filename>.
         """
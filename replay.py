@@ -0,0 +1,271 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the ReplayWriter class, which records the moves of a game
+to a binary stream as they are made, and the ReplayReader class, which plays
+them back without a display.
+
+A replay starts with a header: the bytes b'BRPL', the number of players, the
+goal type and colour index of each player, and the initial board as encoded
+by serialize.encode, preceded by its length. Each successful move follows as
+a record of the player ID, the action, the length of the path from the root to
+the block moved and the path itself, packed 4 child indexes to a byte. Since
+smashes are random, the record of a smash ends with the encoding of the block
+it made, preceded by its length.
+
+Lengths are 2 byte big endian integers, and every other field is one byte.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
+from block import Block
+from goal import BlobGoal, Goal, PerimeterGoal
+from moves import block_at
+from serialize import decode, encode
+from settings import COLOUR_LIST, COLOUR_INDEX
+
+# The first bytes of every replay
+_MAGIC = b'BRPL'
+
+# The code of each action and goal type is its index in these tuples.
+_ACTIONS = (ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, SWAP_HORIZONTAL,
+            SWAP_VERTICAL, SMASH, PAINT, COMBINE, PASS)
+_GOAL_TYPES = (PerimeterGoal, BlobGoal)
+
+
+def _pack_path(path: Tuple[int, ...]) -> bytes:
+    """Return the child indexes in <path>, 4 to a byte with the first in the
+    most significant bits, preceded by the length of <path>.
+
+    >>> _pack_path((3, 0, 1, 2, 1))
+    b'\\x05\\xc6@'
+    """
+    packed = bytearray([len(path)])
+    for start in range(0, len(path), 4):
+        byte = 0
+        for i, index in enumerate(path[start:start + 4]):
+            byte |= index << (6 - 2 * i)
+        packed.append(byte)
+    return bytes(packed)
+
+
+def _unpack_path(length: int, packed: bytes) -> Tuple[int, ...]:
+    """Return the <length> child indexes packed into <packed> by _pack_path.
+
+    >>> _unpack_path(5, b'\\xc6@')
+    (3, 0, 1, 2, 1)
+    """
+    return tuple((packed[i // 4] >> (6 - 2 * (i % 4))) & 3
+                 for i in range(length))
+
+
+def _with_length(data: bytes) -> bytes:
+    """Return <data> preceded by its length.
+    """
+    return len(data).to_bytes(2, 'big') + data
+
+
+class ReplayWriter:
+    """A recorder of the moves of one game, which appends each move to a binary
+    stream as soon as it is made.
+    """
+    # === Private Attributes ===
+    # _stream:
+    #   The stream the replay is written to.
+    _stream: BinaryIO
+
+    def __init__(self, stream: BinaryIO, board: Block,
+                 goals: List[Goal]) -> None:
+        """Initialize a recorder of a game on <board> between players with
+        <goals>, indexed by player ID, and write the header of the replay to
+        <stream>.
+
+        Precondition:
+            - <board> has not been moved on yet.
+            - Every goal is a PerimeterGoal or BlobGoal.
+        """
+        self._stream = stream
+        header = bytearray(_MAGIC)
+        header.append(len(goals))
+        for goal in goals:
+            header.append(_GOAL_TYPES.index(type(goal)))
+            header.append(COLOUR_INDEX[goal.colour])
+        stream.write(bytes(header) + _with_length(encode(board)))
+
+    def record(self, player_id: int,
+               move: Tuple[str, Optional[int], Block]) -> None:
+        """Append <move>, which the player with <player_id> has just made
+        successfully, to the replay.
+        """
+        action = (move[0], move[1])
+        block = move[2]
+        record = bytes([player_id, _ACTIONS.index(action)]) + \
+            _pack_path(() if action == PASS else block.path())
+        if action == SMASH:
+            record += _with_length(encode(block))
+        self._stream.write(record)
+
+
+class ReplayReader:
+    """A player of the replay of one game, which reads its moves from a binary
+    stream one at a time and makes them on a board, without keeping any earlier
+    boards.
+
+    In a game with n players, turn t starts after n * t moves.
+
+    === Public Attributes ===
+    goals:
+        The goal of each player, indexed by player ID.
+    board:
+        The board after the moves that have been read.
+    penalties:
+        The penalties incurred by each player in the moves that have been
+        read, indexed by player ID.
+    moves_read:
+        The number of moves that have been read.
+    """
+    # === Private Attributes ===
+    # _stream:
+    #   The stream the replay is read from.
+    goals: List[Goal]
+    board: Block
+    penalties: List[int]
+    moves_read: int
+    _stream: BinaryIO
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """Initialize a player of the replay in <stream>, by reading its
+        header.
+
+        Raise a ValueError if <stream> does not start with a replay header.
+        """
+        self._stream = stream
+        if stream.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('not a replay')
+        num_players = self._read(1)[0]
+        goal_codes = self._read(2 * num_players)
+        self.goals = [
+            _GOAL_TYPES[goal_codes[i]](COLOUR_LIST[goal_codes[i + 1]])
+            for i in range(0, len(goal_codes), 2)]
+        self.board = decode(self._read_with_length())
+        self.penalties = [0] * num_players
+        self.moves_read = 0
+
+    def _read(self, size: int) -> bytes:
+        """Return the next <size> bytes of the replay.
+
+        Raise a ValueError if the replay ends first.
+        """
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise ValueError('truncated replay')
+        return data
+
+    def _read_with_length(self) -> bytes:
+        """Return the next field of the replay that is preceded by its length.
+        """
+        return self._read(int.from_bytes(self._read(2), 'big'))
+
+    def moves(self) -> Iterator[Tuple[int, Tuple[str, Optional[int]],
+                                      Tuple[int, ...]]]:
+        """Yield the player ID, action and path to the block of each remaining
+        move in the replay, after making it on <board>.
+
+        Raise a ValueError if a move cannot be made.
+        """
+        while True:
+            first = self._stream.read(1)
+            if not first:
+                return
+            player_id = first[0]
+            action_code, length = self._read(2)
+            action = _ACTIONS[action_code]
+            path = _unpack_path(length, self._read((length + 3) // 4))
+            smashed = self._read_with_length() if action == SMASH else None
+            if not self._make(player_id, action, path, smashed):
+                raise ValueError(f'move {self.moves_read} cannot be made')
+            self.penalties[player_id] += ACTION_PENALTY[action]
+            self.moves_read += 1
+            yield player_id, action, path
+
+    def advance(self, num_moves: int) -> int:
+        """Make up to <num_moves> more moves of the replay on <board>, and
+        return the number that were made.
+        """
+        made = 0
+        if num_moves > 0:
+            for _ in self.moves():
+                made += 1
+                if made == num_moves:
+                    break
+        return made
+
+    def _make(self, player_id: int, action: Tuple[str, Optional[int]],
+              path: Tuple[int, ...], smashed: Optional[bytes]) -> bool:
+        """Make <action> for the player with <player_id> on the block at <path>
+        in <board>. <smashed> is the encoding of the block made by a smash.
+
+        Return True iff the move was successful.
+        """
+        block = block_at(self.board, path)
+        if block is None:
+            return False
+        if action in [ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE]:
+            return block.rotate(action[1])
+        elif action in [SWAP_HORIZONTAL, SWAP_VERTICAL]:
+            return block.swap(action[1])
+        elif action == PAINT:
+            return block.paint(self.goals[player_id].colour)
+        elif action == COMBINE:
+            return block.combine()
+        elif action == SMASH:
+            if not block.smashable():
+                return False
+            result = decode(smashed, block.position, block.size)
+            if result.level != block.level or not result.children:
+                return False
+            block.colour = None
+            block.children = result.children
+            return True
+        return True
+
+    def scores(self) -> List[Tuple[int, int, int]]:
+        """Return a list of tuples containing each player ID, goal score and
+        penalty after the moves that have been read, as returned by
+        simulation.play_turns.
+        """
+        return [(player_id, goal.score(self.board),
+                 self.penalties[player_id])
+                for player_id, goal in enumerate(self.goals)]
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'actions', 'block',
+            'goal', 'moves', 'serialize', 'settings'
+        ],
+        'max-attributes': 15
+    })
@@ -0,0 +1,275 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the SearchEngine class, which looks several moves ahead to
+choose a move for one player, taking every player's goal into account.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import math
+import time
+
+from actions import ACTION_PENALTY, PASS, SMASH
+from block import Block
+from goal import Goal, TranspositionTable
+from moves import MoveJournal, legal_moves
+
+# A move, as returned by Player.generate_move
+Move = Tuple[str, Optional[int], Block]
+
+
+class _Timeout(Exception):
+    """Raised inside a search when its time budget has run out."""
+
+
+class SearchEngine:
+    """A depth-limited paranoid alpha-beta search over the moves of every
+    player, with iterative deepening.
+
+    Players move in the order of their IDs, as in a game. A position is valued
+    from the point of view of the searching player, as their goal score minus
+    their penalties, less the best score minus penalties of any other player.
+    The searching player maximizes this value, and every other player is
+    assumed to minimize it.
+
+    Moves are tried on the board itself and undone with a MoveJournal, and
+    goal scores are memoized in a TranspositionTable, so each position costs
+    only the rescoring of the path that its move changed.
+
+    Smashes are not searched, since their outcome is random. Passing is always
+    considered.
+
+    === Public Attributes ===
+    goals:
+        The goal of each player, indexed by player ID.
+    time_limit:
+        The number of seconds each search may take. The first ply is always
+        searched in full, however long it takes.
+    max_plies:
+        The deepest number of plies that iterative deepening goes to.
+    breadth:
+        The most moves tried at each position more than one ply from the end
+        of the search, after ordering them from best to worst for the player
+        to move, or None to try them all. Every move of the searching player
+        is tried to a depth of two plies, but deeper searches only try the
+        best <breadth> moves of the last search, and passing.
+    """
+    # === Private Attributes ===
+    # _player:
+    #   The ID of the player the search in progress is for.
+    # _table:
+    #   The goal scores of positions that have already been valued.
+    # _journal:
+    #   Records the moves of the search in progress, so they can be undone.
+    # _deadline:
+    #   The time, from time.perf_counter, at which the search in progress
+    #   must stop, or None if it must not stop.
+    # _killers:
+    #   For each number of plies remaining, the last move that caused a
+    #   cutoff at that many plies. It is tried first at sibling positions.
+    goals: List[Goal]
+    time_limit: float
+    max_plies: int
+    breadth: Optional[int]
+    _player: int
+    _table: TranspositionTable
+    _journal: MoveJournal
+    _deadline: Optional[float]
+    _killers: Dict[int, Move]
+
+    def __init__(self, goals: List[Goal], time_limit: float = 1.0,
+                 max_plies: int = 4, breadth: Optional[int] = 12) -> None:
+        """Initialize an engine for a game between players with <goals>.
+
+        Precondition:
+            - len(goals) >= 1
+            - time_limit >= 0 and max_plies >= 1
+        """
+        self.goals = goals
+        self.time_limit = time_limit
+        self.max_plies = max_plies
+        self.breadth = breadth
+        self._player = 0
+        self._table = TranspositionTable()
+        self._journal = MoveJournal()
+        self._deadline = None
+        self._killers = {}
+
+    def search(self, board: Block, player_id: int) -> Tuple[Move, int]:
+        """Return the best move for the player with <player_id> on <board>,
+        and the number of plies the search completed.
+
+        <board> is left as it was. The move is a PASS if no other move is
+        better than passing.
+        """
+        self._player = player_id
+        moves = self._moves(board, player_id)
+        best = moves[0]
+        completed = 0
+        self._killers = {}
+        deadline = time.perf_counter() + self.time_limit
+        for plies in range(1, self.max_plies + 1):
+            self._deadline = None if plies == 1 else deadline
+            if plies > 1 and time.perf_counter() >= deadline:
+                break
+            tried, rest = moves, []
+            if plies > 2 and self.breadth is not None:
+                tried, rest = moves[:self.breadth], moves[self.breadth:]
+                tried.extend(move for move in rest if move[0] == PASS[0])
+                rest = [move for move in rest if move[0] != PASS[0]]
+            try:
+                values = self._search_root(board, player_id, tried, plies)
+            except _Timeout:
+                break
+            # Keep passing first among equals, so that a move is only made
+            # when it is an improvement.
+            order = sorted(range(len(tried)),
+                           key=lambda i: (-values[i], tried[i][0] != PASS[0]))
+            moves = [tried[i] for i in order] + rest
+            best = moves[0]
+            completed = plies
+        self._deadline = None
+        return best, completed
+
+    def _search_root(self, board: Block, player_id: int, moves: List[Move],
+                     plies: int) -> List[float]:
+        """Return the value of each of <moves> for the player with <player_id>,
+        searching <plies> plies ahead.
+
+        The value of the best move, and of every move that ties it, is exact.
+        Any other move may be given an upper bound on its value instead.
+        """
+        penalties = [0] * len(self.goals)
+        values = []
+        alpha = -math.inf
+        for move in moves:
+            value = self._try(board, move, player_id, plies, alpha, math.inf,
+                              penalties)
+            if value == alpha:
+                # A move that fails low is only given an upper bound on its
+                # value, so one that ties the best move so far is searched
+                # again with a full window. Otherwise passing could be chosen
+                # over a better move on the strength of a bound.
+                value = self._try(board, move, player_id, plies, -math.inf,
+                                  math.inf, penalties)
+            values.append(value)
+            alpha = max(alpha, value)
+        return values
+
+    def _try(self, board: Block, move: Move, mover: int, plies: int,
+             alpha: float, beta: float, penalties: List[int]) -> float:
+        """Return the value of making <move> for <mover> on <board>, searching
+        <plies> plies ahead in total, within the window (<alpha>, <beta>).
+        """
+        applied = self._journal.apply(move, self.goals[mover].colour)
+        penalty = ACTION_PENALTY[(move[0], move[1])] if applied else 0
+        penalties[mover] += penalty
+        try:
+            return self._value(board, (mover + 1) % len(self.goals),
+                               plies - 1, alpha, beta, penalties)
+        finally:
+            penalties[mover] -= penalty
+            if applied:
+                self._journal.undo()
+
+    def _value(self, board: Block, mover: int, plies: int, alpha: float,
+               beta: float, penalties: List[int]) -> float:
+        """Return the value of <board> when it is <mover>'s turn, searching
+        <plies> plies ahead, within the window (<alpha>, <beta>).
+        """
+        if self._deadline is not None and time.perf_counter() >= \
+                self._deadline:
+            raise _Timeout
+        if plies == 0:
+            return self.evaluate(board, penalties)
+
+        maximizing = mover == self._player
+        moves = self._moves(board, mover)
+        killer = self._killers.get(plies)
+        for i, move in enumerate(moves):
+            # Moves are compared by the identity of their block, since
+            # comparing Blocks with == compares their whole trees.
+            if killer is not None and move[2] is killer[2] and \
+                    move[:2] == killer[:2]:
+                moves.insert(0, moves.pop(i))
+                break
+        if plies > 1:
+            moves = self._ordered(board, mover, moves, maximizing,
+                                  penalties)
+
+        value = -math.inf if maximizing else math.inf
+        for move in moves:
+            result = self._try(board, move, mover, plies, alpha, beta,
+                               penalties)
+            if maximizing:
+                value = max(value, result)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, result)
+                beta = min(beta, value)
+            if alpha >= beta:
+                self._killers[plies] = move
+                break
+        return value
+
+    def _ordered(self, board: Block, mover: int, moves: List[Move],
+                 maximizing: bool, penalties: List[int]) -> List[Move]:
+        """Return <moves> ordered from best to worst for <mover> by their
+        value one ply ahead, cut down to <breadth> moves.
+        """
+        values = [self._try(board, move, mover, 1, -math.inf, math.inf,
+                            penalties) for move in moves]
+        order = sorted(range(len(moves)), key=values.__getitem__,
+                       reverse=maximizing)
+        if self.breadth is not None:
+            order = order[:self.breadth]
+        return [moves[i] for i in order]
+
+    def _moves(self, board: Block, mover: int) -> List[Move]:
+        """Return the moves <mover> may make on <board> in a search: passing,
+        followed by every legal move other than a smash.
+        """
+        colour = self.goals[mover].colour
+        return [PASS + (board,)] + \
+            [move for move in legal_moves(board, colour)
+             if (move[0], move[1]) != SMASH]
+
+    def evaluate(self, board: Block, penalties: List[int]) -> float:
+        """Return the value of <board> for the player the search is for, given
+        that each player has incurred <penalties> during the search.
+        """
+        net = [self._table.score(goal, board) - penalties[i]
+               for i, goal in enumerate(self.goals)]
+        mine = net[self._player]
+        others = net[:self._player] + net[self._player + 1:]
+        return mine - max(others) if others else mine
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'math', 'time',
+            'actions', 'block', 'goal', 'moves'
+        ],
+        'max-attributes': 15
+    })
@@ -0,0 +1,132 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains functions that encode a board as a few bytes, and decode
+those bytes back into a board.
+
+An encoded board starts with two header bytes, the max_depth and level of its
+root. The rest is a bitstream that visits the blocks in preorder, most
+significant bit first. Each block above max_depth starts with a flag bit, 1 if
+it has children and 0 if it is a leaf. Blocks at max_depth are always leaves,
+so they have no flag. Each leaf is followed by the 2 bit index of its colour in
+COLOUR_LIST. The last byte is padded with 0 bits.
+"""
+from typing import List, Tuple
+
+from block import Block
+from settings import BOARD_SIZE, COLOUR_LIST, COLOUR_INDEX
+
+# The number of bits in the palette index of a leaf's colour.
+_COLOUR_BITS = 2
+
+# The bits of each palette index, as written to the bitstream.
+_INDEX_BITS = [format(i, f'0{_COLOUR_BITS}b')
+               for i in range(2 ** _COLOUR_BITS)]
+
+
+def encode(block: Block) -> bytes:
+    """Return the encoding of the tree rooted at <block>.
+
+    Raise a ValueError if a leaf's colour is not in COLOUR_LIST.
+
+    >>> board = Block((0, 0), 750, COLOUR_LIST[1], 0, 3)
+    >>> encode(board)
+    b'\\x03\\x00 '
+    """
+    bits = []
+    stack = [block]
+    while stack:
+        current = stack.pop()
+        children = current.children
+        if current.level < current.max_depth:
+            bits.append('1' if children else '0')
+        if children:
+            stack.extend(reversed(children))
+        elif current.colour in COLOUR_INDEX:
+            bits.append(_INDEX_BITS[COLOUR_INDEX[current.colour]])
+        else:
+            raise ValueError(f'{current.colour} is not in COLOUR_LIST')
+
+    stream = ''.join(bits)
+    stream += '0' * (-len(stream) % 8)
+    return bytes([block.max_depth, block.level]) + \
+        int('1' + stream, 2).to_bytes(len(stream) // 8 + 1, 'big')[1:]
+
+
+def decode(data: bytes, position: Tuple[int, int] = (0, 0),
+           size: int = BOARD_SIZE) -> Block:
+    """Return a new tree of Blocks with the encoding <data>, with its upper
+    left corner at <position> and dimensions of <size> by <size>.
+
+    Children are laid out in the same way as by Block.smash. Raise a
+    ValueError if <data> is not a complete encoding.
+
+    >>> board = Block((0, 0), 750, COLOUR_LIST[1], 0, 3)
+    >>> decode(encode(board)) == board
+    True
+    """
+    if len(data) < 2:
+        raise ValueError('missing header')
+    max_depth, level = data[0], data[1]
+    if level > max_depth:
+        raise ValueError('root is deeper than max_depth')
+    bits = format(int.from_bytes(b'\x01' + data[2:], 'big'), 'b')[1:]
+    block, end = _decode(bits, 0, position, size, level, max_depth)
+    if end > len(bits):
+        raise ValueError('truncated encoding')
+    return block
+
+
+def _decode(bits: str, start: int, position: Tuple[int, int], size: int,
+            level: int, max_depth: int) -> Tuple[Block, int]:
+    """Return the block encoded in <bits> from index <start> at <level>, with
+    its upper left corner at <position> and dimensions of <size> by <size>,
+    and the index just after its encoding.
+    """
+    if level < max_depth and bits[start:start + 1] == '1':
+        block = Block(position, size, None, level, max_depth)
+        half = size // 2
+        x, y = position
+        children: List[Block] = []
+        end = start + 1
+        for child_position in [(x + half, y), (x, y), (x, y + half),
+                               (x + half, y + half)]:
+            child, end = _decode(bits, end, child_position, half, level + 1,
+                                 max_depth)
+            children.append(child)
+        block.children = children
+        return block, end
+
+    start += level < max_depth
+    index = bits[start:start + _COLOUR_BITS]
+    if len(index) < _COLOUR_BITS:
+        raise ValueError('truncated encoding')
+    return Block(position, size, COLOUR_LIST[int(index, 2)], level,
+                 max_depth), start + _COLOUR_BITS
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'block', 'settings'
+        ]
+    })
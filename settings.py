@@ -35,6 +35,8 @@ TEMPTING_TURQUOISE = (75, 196, 213)
 
 # A pallette of the colours we use in the game
 COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
+# The index of each colour in COLOUR_LIST, for compact board representations
+COLOUR_INDEX = {colour: i for i, colour in enumerate(COLOUR_LIST)}
 
 # The game board will be a square with this size.
 BOARD_SIZE = 750
@@ -55,6 +57,10 @@ HIGHLIGHT_THICKNESS = 5
 # The number of seconds a move is animated for.
 ANIMATION_DURATION = 1
 
+# Boards at least this deep are drawn with raster.raster_squares, when NumPy
+# is installed, rather than one rectangle at a time.
+RASTER_MIN_DEPTH = 6
+
 
 def colour_name(colour: Tuple[int, int, int]) -> str:
     """Return the colour name associated with this colour value, or the empty
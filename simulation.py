@@ -0,0 +1,134 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the HeadlessGame class, which plays games of Blocky between
+computer players as fast as possible, without a display, a frame rate or move
+animations.
+"""
+from typing import BinaryIO, List, Optional, Tuple
+import random
+import pygame
+
+from block import generate_board
+from blocky import GameData
+from player import create_players
+from settings import BOARD_SIZE
+
+# The event that tells a computer player to make its move. In a displayed
+# game, this is a click of the left mouse button.
+_PROCEED = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1)
+
+# The most times in a row a player may make an unsuccessful move before the
+# game gives up on it.
+_MAX_ATTEMPTS = 1000
+
+
+def play_turns(data: GameData, num_turns: int) -> List[Tuple[int, int, int]]:
+    """Play <num_turns> turns on <data>, and return a list of tuples containing
+    each player ID, goal score and penalty at the end of the game.
+
+    This follows the same turn order as MainState: in each turn, every player
+    makes one successful move, in the order of <data.players>.
+
+    Precondition:
+        - None of <data.players> are HumanPlayers.
+    """
+    data.max_turns = num_turns
+    for _ in range(num_turns):
+        for player in data.players:
+            attempts = 0
+            move_successful = False
+            while not move_successful:
+                if attempts == _MAX_ATTEMPTS:
+                    raise RuntimeError(f'Player {player.id} did not make a '
+                                       f'successful move')
+                attempts += 1
+                player.process_event(_PROCEED)
+                move = player.generate_move(data.board)
+                if move is None:
+                    raise ValueError(f'Player {player.id} needs input to '
+                                     f'move, so cannot play headless')
+                move_successful = data.apply_move(player, move)
+
+    scores = []
+    for player in data.players:
+        goal_score, penalty = data.calculate_score(player.id)
+        scores.append((player.id, goal_score, penalty))
+    return scores
+
+
+def winner(scores: List[Tuple[int, int, int]]) -> int:
+    """Return the ID of the winning player, given the <scores> returned by
+    play_turns. Ties go to the player that moves first.
+    """
+    return max(scores, key=lambda item: item[1] - item[2])[0]
+
+
+class HeadlessGame:
+    """A game of Blocky between computer players, with no display.
+    """
+    # === Private Attributes ===
+    # _data:
+    #   The data of the game.
+    _data: GameData
+
+    def __init__(self, max_depth: int, num_random: int,
+                 smart_players: List[int],
+                 replay: Optional[BinaryIO] = None,
+                 rng: Optional[random.Random] = None) -> None:
+        """Initialize this game with <num_random> RandomPlayers followed by a
+        SmartPlayer for each difficulty level in <smart_players>.
+
+        If <replay> is not None, the game is recorded to it as it is played.
+        The board, the goals and every random choice in the game are drawn
+        from <rng>, or from the random module if <rng> is None, so a game with
+        its own generator can be played again exactly from the same seed.
+
+        Precondition:
+            - 1 <= num_random + len(smart_players) <= len(COLOUR_LIST)
+        """
+        board = generate_board(max_depth, BOARD_SIZE, rng)
+        players = create_players(0, num_random, smart_players, rng=rng)
+        self._data = GameData(board, players, replay, rng)
+
+    def run_game(self, num_turns: int) -> List[Tuple[int, int, int]]:
+        """Play the game for <num_turns> turns, and return a list of tuples
+        containing each player ID, goal score and penalty at the end of the
+        game.
+        """
+        return play_turns(self._data, num_turns)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', 'pygame', 'blocky',
+            'block', 'player', 'settings', 'time'
+        ],
+        'generated-members': 'pygame.*'
+    })
+
+    import time
+    start = time.perf_counter()
+    game = HeadlessGame(4, 1, [5, 10])
+    print(game.run_game(20))
+    print(f'Played in {time.perf_counter() - start:.3f} seconds')
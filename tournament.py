@@ -0,0 +1,148 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains a tournament runner, which plays many seeded headless games
+of Blocky between computer players in parallel and summarizes the results.
+"""
+from typing import Dict, List, Optional, Tuple
+import random
+import statistics
+
+from simulation import HeadlessGame, winner
+from workers import spawn_pool
+
+
+def _play_game(game: Tuple[int, int, int, List[int], int]) \
+        -> List[Tuple[int, int, int]]:
+    """Play one headless game, described by a tuple of its seed, max_depth,
+    number of random players, SmartPlayer difficulties and number of turns.
+
+    Return each player ID, goal score and penalty at the end of the game.
+    """
+    seed, max_depth, num_random, smart_players, num_turns = game
+    return HeadlessGame(max_depth, num_random, smart_players,
+                        rng=random.Random(seed)).run_game(num_turns)
+
+
+class TournamentResult:
+    """The summarized results of a tournament.
+
+    Players are identified by their seat, which is their player ID in every
+    game of the tournament.
+
+    === Public Attributes ===
+    labels:
+        A description of the player in each seat.
+    wins:
+        The number of games won by the player in each seat.
+    scores:
+        The final score, after penalties, of the player in each seat, in the
+        order the games were played.
+    penalties:
+        The total penalty of the player in each seat, over all games.
+    """
+    labels: List[str]
+    wins: Dict[int, int]
+    scores: Dict[int, List[int]]
+    penalties: Dict[int, int]
+
+    def __init__(self, labels: List[str],
+                 games: List[List[Tuple[int, int, int]]]) -> None:
+        """Initialize this TournamentResult for players described by <labels>
+        from the final scores of each of <games>, as returned by play_turns.
+        """
+        self.labels = labels
+        self.wins = {seat: 0 for seat in range(len(labels))}
+        self.scores = {seat: [] for seat in range(len(labels))}
+        self.penalties = {seat: 0 for seat in range(len(labels))}
+
+        for scores in games:
+            self.wins[winner(scores)] += 1
+            for player_id, goal_score, penalty in scores:
+                self.scores[player_id].append(goal_score - penalty)
+                self.penalties[player_id] += penalty
+
+    def num_games(self) -> int:
+        """Return the number of games in the tournament.
+        """
+        return sum(self.wins.values())
+
+    def win_rate(self, seat: int) -> float:
+        """Return the fraction of games won by the player in <seat>.
+        """
+        return self.wins[seat] / max(1, self.num_games())
+
+    def __str__(self) -> str:
+        """Return a table of the win rate and score distribution of each
+        player.
+        """
+        lines = [f'{"player":<12} {"wins":>6} {"mean":>8} {"median":>8} '
+                 f'{"min":>6} {"max":>6} {"penalty":>8}']
+        for seat, label in enumerate(self.labels):
+            scores = self.scores[seat] or [0]
+            lines.append(f'{label:<12} {self.win_rate(seat):>6.1%} '
+                         f'{statistics.mean(scores):>8.2f} '
+                         f'{statistics.median(scores):>8.1f} '
+                         f'{min(scores):>6} {max(scores):>6} '
+                         f'{self.penalties[seat]:>8}')
+        return '\n'.join(lines)
+
+
+def run_tournament(num_games: int, max_depth: int, num_random: int,
+                   smart_players: List[int], num_turns: int, seed: int = 0,
+                   processes: Optional[int] = None) -> TournamentResult:
+    """Play <num_games> headless games of <num_turns> turns each, on boards
+    with a depth of <max_depth>, and return the summarized results.
+
+    Each game has <num_random> RandomPlayers followed by a SmartPlayer for
+    each difficulty level in <smart_players>. Game i is seeded with
+    <seed> + i, so every game can be played again on its own.
+
+    The games are shared between <processes> worker processes, or one per
+    core if <processes> is None. If <processes> is 1, the games are played in
+    this process.
+
+    Precondition:
+        - 1 <= num_random + len(smart_players) <= len(COLOUR_LIST)
+    """
+    games = [(seed + i, max_depth, num_random, smart_players, num_turns)
+             for i in range(num_games)]
+    if processes == 1:
+        results = [_play_game(game) for game in games]
+    else:
+        with spawn_pool(processes) as pool:
+            results = pool.map(_play_game, games)
+
+    labels = ['Random'] * num_random + \
+        [f'Smart({difficulty})' for difficulty in smart_players]
+    return TournamentResult(labels, results)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', 'workers',
+            'statistics', 'simulation'
+        ]
+    })
+
+    print(run_tournament(100, 4, 1, [1, 5, 20], 10))
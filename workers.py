@@ -0,0 +1,48 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the function that starts the process pools used to play
+games and score moves in parallel.
+"""
+from typing import Optional
+import multiprocessing
+import multiprocessing.pool
+
+
+def spawn_pool(processes: Optional[int] = None) -> multiprocessing.pool.Pool:
+    """Return a new pool of <processes> worker processes, or one per core if
+    <processes> is None.
+
+    Workers are spawned rather than forked, since forking a process that has
+    already started pygame can leave the workers deadlocked. The caller must
+    close the pool when it is done with it.
+    """
+    return multiprocessing.get_context('spawn').Pool(processes)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', 'multiprocessing'
+        ]
+    })